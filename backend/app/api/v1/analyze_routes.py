@@ -1,32 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File, Request
 from sqlalchemy.orm import Session as DBSession
 from typing import Dict, Any
 
-from ...services.summarizer_service import SummarizerService
-from ...database.db_manager import DatabaseManager
-from ...database.session_handler import SessionHandler
-from ...database.cache_manager import CacheManager
-from ...core.config import settings
+from services.summarizer_service import SummarizerService
+from database.db_manager import DatabaseManager
+from database.session_handler import SessionHandler
+from core.config import settings
 
 # --- Inicialización y Router ---
 
 router = APIRouter(prefix="/v1")
-summarizer_service = SummarizerService()
-db_manager = DatabaseManager() # Se asume que db_manager y cache_manager son singletones
+
+# --- Dependencias de Servicios ---
+
+def get_summarizer_service(request: Request) -> SummarizerService:
+    """Devuelve el servicio compartido, inicializado en el lifespan de main.py."""
+    return request.app.state.summarizer_service
+
+def get_db_manager(request: Request) -> DatabaseManager:
+    """Devuelve el DatabaseManager del lifespan (un solo pool de conexiones por proceso)."""
+    return request.app.state.db_manager
 
 # --- Dependencia de Sesión de BD ---
 
-def get_db():
+def get_db(db_manager: DatabaseManager = Depends(get_db_manager)):
     db = db_manager.get_session()
     try:
         yield db
     finally:
         db.close()
 
-def get_session_handler(db: DBSession = Depends(get_db)):
+def get_session_handler(
+    db: DBSession = Depends(get_db),
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    summarizer_service: SummarizerService = Depends(get_summarizer_service)
+):
     """Inyecta el manejador de sesión para acceso a BD y Cache."""
-    cache_manager = CacheManager() 
-    return SessionHandler(db=db, redis_client=cache_manager.redis)
+    return SessionHandler(
+        db=db,
+        redis_client=summarizer_service.cache_manager.redis,
+        async_sessions=db_manager.AsyncSessionLocal
+    )
 
 # --- Rutas de Análisis ---
 
@@ -34,7 +48,8 @@ def get_session_handler(db: DBSession = Depends(get_db)):
 async def analyze_pdf_endpoint(
     session_id: str = Form(...),
     file: UploadFile = File(...),
-    session_handler: SessionHandler = Depends(get_session_handler)
+    session_handler: SessionHandler = Depends(get_session_handler),
+    summarizer_service: SummarizerService = Depends(get_summarizer_service)
 ):
     # NOTA: La validación de tipo de archivo ya se hace en main.py y en el ML-Core, pero aquí se previene el fallo.
     if file.content_type not in settings.SUPPORTED_PDF_EXTENSIONS:
@@ -47,7 +62,10 @@ async def analyze_pdf_endpoint(
     return result
 
 @router.post("/analyze/video")
-async def analyze_video_endpoint(request_data: Dict[str, Any]):
+async def analyze_video_endpoint(
+    request_data: Dict[str, Any],
+    summarizer_service: SummarizerService = Depends(get_summarizer_service)
+):
     url = request_data.get("url")
     session_id = request_data.get("session_id")
     
@@ -61,7 +79,10 @@ async def analyze_video_endpoint(request_data: Dict[str, Any]):
     return result
 
 @router.post("/generate/quiz/{document_id}")
-async def generate_quiz_endpoint(document_id: int):
+async def generate_quiz_endpoint(
+    document_id: int,
+    summarizer_service: SummarizerService = Depends(get_summarizer_service)
+):
     result = await summarizer_service.generate_quiz_request(document_id)
     return result
 
@@ -76,7 +97,7 @@ async def get_history_endpoint(
     try:
         # Se asume que get_session_handler devuelve un SessionHandler
         # que ya tiene acceso a la DB y Cache.
-        history = session_handler.get_session_history(session_id)
+        history = await session_handler.get_session_history_async(session_id)
         return {"history": history}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener historial: {e}")
\ No newline at end of file
@@ -12,6 +12,15 @@ class Settings:
     REDIS_URL: str = os.getenv("REDIS_URL")
     
     ML_CORE_URL: str = os.getenv("ML_CORE_URL", "http://ml_core:8001")
+    ML_CORE_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("ML_CORE_CONNECT_TIMEOUT_SECONDS", "5"))
+    ML_CORE_PDF_TIMEOUT_SECONDS: float = float(os.getenv("ML_CORE_PDF_TIMEOUT_SECONDS", "300"))
+    ML_CORE_VIDEO_TIMEOUT_SECONDS: float = float(os.getenv("ML_CORE_VIDEO_TIMEOUT_SECONDS", "600"))
+    ML_CORE_QUIZ_TIMEOUT_SECONDS: float = float(os.getenv("ML_CORE_QUIZ_TIMEOUT_SECONDS", "120"))
+    ML_CORE_MAX_CONNECTIONS: int = int(os.getenv("ML_CORE_MAX_CONNECTIONS", "100"))
+    ML_CORE_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("ML_CORE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    ML_CORE_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("ML_CORE_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    # Requiere el paquete opcional 'h2' y un servidor ml-core con soporte HTTP/2.
+    ML_CORE_HTTP2: bool = os.getenv("ML_CORE_HTTP2", "false").lower() == "true"
     
     SECRET_KEY: str = os.getenv("SECRET_KEY", "super-secret-key-for-dev")
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:3001")
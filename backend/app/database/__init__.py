@@ -1,15 +1,18 @@
-from database.models import Base, Session, Document, Quiz, QuizAttempt
+from database.models import Base, Session, Document, Transcript, Quiz, QuizAttempt
 from database.db_manager import DatabaseManager
 from database.cache_manager import CacheManager
 from database.session_handler import SessionHandler
+from database.transcript_store import TranscriptStore
 
 __all__ = [
     "Base",
     "Session",
     "Document",
+    "Transcript",
     "Quiz",
     "QuizAttempt",
     "DatabaseManager",
     "CacheManager",
-    "SessionHandler"
+    "SessionHandler",
+    "TranscriptStore"
 ]
\ No newline at end of file
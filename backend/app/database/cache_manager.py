@@ -1,6 +1,7 @@
 import redis
 import json
-from typing import Any, Optional
+import uuid
+from typing import Any, Optional, Tuple
 from config import settings
 
 
@@ -38,6 +39,65 @@ class CacheManager:
             print(f"Error al obtener resumen cacheado: {e}")
             return None
     
+    def cache_chunk_summary(self, chunk_key: str, summary: str, ttl: int = 604800) -> bool:
+        try:
+            key = f"chunk_summary:{chunk_key}"
+            self.redis.setex(key, ttl, summary)
+            return True
+        except Exception as e:
+            print(f"Error al cachear resumen de fragmento: {e}")
+            return False
+    
+    def get_cached_chunk_summary(self, chunk_key: str) -> Optional[str]:
+        try:
+            key = f"chunk_summary:{chunk_key}"
+            return self.redis.get(key)
+        except Exception as e:
+            print(f"Error al obtener resumen de fragmento cacheado: {e}")
+            return None
+    
+    def cache_file_content_hash(self, file_hash: str, content_hash: str, ttl: int = 604800) -> bool:
+        try:
+            key = f"file_hash:{file_hash}"
+            self.redis.setex(key, ttl, content_hash)
+            return True
+        except Exception as e:
+            print(f"Error al cachear hash de archivo: {e}")
+            return False
+    
+    def get_content_hash_for_file(self, file_hash: str) -> Optional[str]:
+        try:
+            key = f"file_hash:{file_hash}"
+            return self.redis.get(key)
+        except Exception as e:
+            print(f"Error al obtener hash de archivo cacheado: {e}")
+            return None
+    
+    def cache_video_info(self, video_id: str, info: dict, ttl: int = 86400) -> bool:
+        try:
+            key = f"video_info:{video_id}"
+            self.redis.setex(key, ttl, json.dumps(info))
+            return True
+        except Exception as e:
+            print(f"Error al cachear información del video: {e}")
+            return False
+    
+    def get_cached_video_info_with_ttl(self, video_id: str) -> Optional[Tuple[dict, int]]:
+        # GET y TTL en un solo viaje: quien copia la entrada a memoria la hace
+        # vencer junto con la de Redis, no un TTL completo más tarde.
+        try:
+            key = f"video_info:{video_id}"
+            pipe = self.redis.pipeline()
+            pipe.get(key)
+            pipe.ttl(key)
+            cached, ttl = pipe.execute()
+            if not cached or ttl == -2:
+                return None
+            return json.loads(cached), ttl
+        except Exception as e:
+            print(f"Error al obtener información del video cacheada: {e}")
+            return None
+    
     def cache_quiz(self, doc_id: int, quiz: dict, ttl: int = 1800) -> bool:
         try:
             key = f"quiz:{doc_id}"
@@ -56,6 +116,67 @@ class CacheManager:
             print(f"Error al obtener quiz cacheado: {e}")
             return None
     
+    def cache_llm_response(self, prompt_hash: str, response: str, ttl: int = 86400) -> bool:
+        try:
+            key = f"llm:{prompt_hash}"
+            self.redis.setex(key, ttl, response)
+            return True
+        except Exception as e:
+            print(f"Error al cachear respuesta del modelo: {e}")
+            return False
+    
+    def get_cached_llm_response(self, prompt_hash: str) -> Optional[str]:
+        try:
+            key = f"llm:{prompt_hash}"
+            return self.redis.get(key)
+        except Exception as e:
+            print(f"Error al obtener respuesta del modelo cacheada: {e}")
+            return None
+    
+    def acquire_lock(self, name: str, ttl: int = 900) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            key = f"lock:{name}"
+            if self.redis.set(key, token, nx=True, ex=ttl):
+                return token
+            return None
+        except Exception as e:
+            # Falla abierto: sin Redis no hay coordinación entre réplicas y el
+            # llamador procede como si tuviera el lock. Dentro del proceso los
+            # análisis idénticos siguen coalesciéndose (AIService._inflight).
+            print(f"Error al adquirir lock: {e}")
+            return token
+    
+    def extend_lock(self, name: str, token: str, ttl: int = 900) -> bool:
+        # Renueva el TTL solo si el lock sigue perteneciendo a quien lo adquirió.
+        script = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 0
+        """
+        try:
+            key = f"lock:{name}"
+            return bool(self.redis.eval(script, 1, key, token, int(ttl * 1000)))
+        except Exception as e:
+            print(f"Error al renovar lock: {e}")
+            return False
+    
+    def release_lock(self, name: str, token: str) -> bool:
+        # Solo libera el lock si sigue perteneciendo a quien lo adquirió.
+        script = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+        """
+        try:
+            key = f"lock:{name}"
+            return bool(self.redis.eval(script, 1, key, token))
+        except Exception as e:
+            print(f"Error al liberar lock: {e}")
+            return False
+    
     def invalidate_session_cache(self, session_id: str) -> bool:
         try:
             key = f"history:{session_id}"
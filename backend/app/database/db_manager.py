@@ -1,10 +1,17 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
-from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import contextmanager, asynccontextmanager
 from config import settings
 from database.models import Base
 
 
+def _async_database_url(url: str) -> str:
+    # postgresql://... -> postgresql+asyncpg://... (mismo servidor, driver asíncrono)
+    scheme, _, rest = url.partition("://")
+    return f"{scheme.split('+')[0]}+asyncpg://{rest}"
+
+
 class DatabaseManager:
     def __init__(self):
         self.engine = create_engine(
@@ -20,11 +27,49 @@ class DatabaseManager:
             autoflush=False,
             bind=self.engine
         )
+        
+        # Motor asíncrono (asyncpg) para las rutas calientes: historial,
+        # duplicados e inserciones, sin bloquear el event loop.
+        self.async_engine = create_async_engine(
+            _async_database_url(settings.DATABASE_URL),
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            echo=False
+        )
+        
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
     
     def create_tables(self):
         Base.metadata.create_all(bind=self.engine)
+        self._migrate_documents_content_hash()
         print("Tablas creadas exitosamente.")
     
+    def _migrate_documents_content_hash(self):
+        # create_all no altera tablas existentes: en bases previas el índice
+        # de content_hash era único global y falta la restricción por sesión.
+        # Las sentencias son idempotentes, se pueden repetir en cada arranque.
+        with self.engine.begin() as connection:
+            connection.execute(text("DROP INDEX IF EXISTS ix_documents_content_hash"))
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash)"
+            ))
+            connection.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_constraint WHERE conname = 'uq_document_session_content'
+                    ) THEN
+                        ALTER TABLE documents
+                            ADD CONSTRAINT uq_document_session_content UNIQUE (session_id, content_hash);
+                    END IF;
+                END $$;
+            """))
+    
     def drop_tables(self):
         Base.metadata.drop_all(bind=self.engine)
         print("Tablas eliminadas.")
@@ -32,6 +77,23 @@ class DatabaseManager:
     def get_session(self) -> Session:
         return self.SessionLocal()
     
+    def get_async_session(self) -> AsyncSession:
+        return self.AsyncSessionLocal()
+    
+    @asynccontextmanager
+    async def async_session_scope(self):
+        async with self.AsyncSessionLocal() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                raise e
+    
+    async def close(self):
+        await self.async_engine.dispose()
+        self.engine.dispose()
+    
     @contextmanager
     def session_scope(self):
         session = self.SessionLocal()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, CheckConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, CheckConstraint, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -28,7 +28,7 @@ class Document(Base):
     doc_type = Column(String(20), nullable=False)
     title = Column(String(500), nullable=False)
     source_url = Column(Text, nullable=True)
-    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    content_hash = Column(String(64), index=True, nullable=False)
     summary_short = Column(Text, nullable=True)
     summary_medium = Column(Text, nullable=True)
     summary_long = Column(Text, nullable=True)
@@ -41,6 +41,23 @@ class Document(Base):
     
     __table_args__ = (
         CheckConstraint("doc_type IN ('pdf', 'video')", name='check_doc_type'),
+        # El mismo contenido puede existir en varias sesiones, pero una sola vez por sesión.
+        UniqueConstraint('session_id', 'content_hash', name='uq_document_session_content'),
+    )
+
+
+class Transcript(Base):
+    __tablename__ = 'transcripts'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    video_id = Column(String(32), nullable=False, index=True)
+    language = Column(String(16), nullable=False)
+    source = Column(String(20), nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('video_id', 'language', name='uq_transcript_video_language'),
     )
 
 
@@ -1,4 +1,6 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from database.models import Session, Document
 from datetime import datetime, timedelta
 import hashlib
@@ -7,9 +9,12 @@ from typing import Optional
 
 
 class SessionHandler:
-    def __init__(self, db: DBSession, redis_client):
+    def __init__(self, db: DBSession, redis_client, async_sessions: Optional[async_sessionmaker] = None):
         self.db = db
         self.redis = redis_client
+        # Fábrica de sesiones asíncronas (DatabaseManager.AsyncSessionLocal);
+        # cada método *_async abre una sesión corta propia.
+        self.async_sessions = async_sessions
     
     def get_or_create_session(self, session_id: Optional[str] = None) -> uuid.UUID:
         if session_id:
@@ -36,21 +41,36 @@ class SessionHandler:
             Document.session_id == session_id
         ).order_by(Document.created_at.desc()).limit(limit).all()
         
-        return [
-            {
-                "id": doc.id,
-                "type": doc.doc_type,
-                "title": doc.title,
-                "summary_short": doc.summary_short,
-                "created_at": doc.created_at.isoformat(),
-                "source_url": doc.source_url
-            }
-            for doc in documents
-        ]
+        return [self._history_entry(doc) for doc in documents]
+    
+    async def get_session_history_async(self, session_id: uuid.UUID, limit: int = 50) -> list:
+        async with self.async_sessions() as db:
+            result = await db.execute(
+                select(Document)
+                .where(Document.session_id == session_id)
+                .order_by(Document.created_at.desc())
+                .limit(limit)
+            )
+            documents = result.scalars().all()
+        
+        return [self._history_entry(doc) for doc in documents]
+    
+    @staticmethod
+    def _history_entry(doc: Document) -> dict:
+        return {
+            "id": doc.id,
+            "type": doc.doc_type,
+            "title": doc.title,
+            "summary_short": doc.summary_short,
+            "created_at": doc.created_at.isoformat(),
+            "source_url": doc.source_url
+        }
     
     def check_duplicate(self, content: str, session_id: uuid.UUID) -> Optional[Document]:
         content_hash = hashlib.sha256(content.encode()).hexdigest()
-        
+        return self.check_duplicate_hash(content_hash, session_id)
+    
+    def check_duplicate_hash(self, content_hash: str, session_id: uuid.UUID) -> Optional[Document]:
         existing = self.db.query(Document).filter(
             Document.content_hash == content_hash,
             Document.session_id == session_id
@@ -58,6 +78,16 @@ class SessionHandler:
         
         return existing
     
+    async def check_duplicate_hash_async(self, content_hash: str, session_id: uuid.UUID) -> Optional[Document]:
+        async with self.async_sessions() as db:
+            result = await db.execute(
+                select(Document).where(
+                    Document.content_hash == content_hash,
+                    Document.session_id == session_id
+                ).limit(1)
+            )
+            return result.scalars().first()
+    
     def cleanup_old_sessions(self, days: int = 30) -> int:
         cutoff = datetime.utcnow() - timedelta(days=days)
         
@@ -0,0 +1,47 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from database.models import Transcript
+from typing import Optional
+
+
+class TranscriptStore:
+    def __init__(self, async_sessions: async_sessionmaker):
+        # Transcripciones por (video_id, idioma), compartidas por todas las sesiones.
+        self.async_sessions = async_sessions
+    
+    async def get(self, video_id: str, languages: list[str]) -> Optional[dict]:
+        try:
+            async with self.async_sessions() as db:
+                result = await db.execute(
+                    select(Transcript).where(
+                        Transcript.video_id == video_id,
+                        Transcript.language.in_(languages)
+                    )
+                )
+                transcripts = {t.language: t for t in result.scalars().all()}
+        except Exception as e:
+            print(f"Error al obtener transcripción almacenada: {e}")
+            return None
+        
+        # Respeta el orden de preferencia de idiomas.
+        for language in languages:
+            if language in transcripts:
+                transcript = transcripts[language]
+                return {"text": transcript.text, "language": transcript.language, "source": transcript.source}
+        return None
+    
+    async def save(self, video_id: str, language: str, source: str, text: str) -> bool:
+        try:
+            async with self.async_sessions() as db:
+                # Dos workers pueden transcribir el mismo video a la vez: gana el primero.
+                await db.execute(
+                    insert(Transcript)
+                    .values(video_id=video_id, language=language, source=source, text=text)
+                    .on_conflict_do_nothing(constraint='uq_transcript_video_language')
+                )
+                await db.commit()
+            return True
+        except Exception as e:
+            print(f"Error al guardar transcripción: {e}")
+            return False
@@ -1,4 +1,5 @@
 import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, Request, HTTPException, Form, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session as DBSession
@@ -10,18 +11,39 @@ from services.summarizer_service import SummarizerService
 from core.config import settings
 from api.v1.analyze_routes import router as analyze_router
 
+# --- Inicialización de Servicios ---
+
+# Instancias únicas compartidas con el router (vía app.state).
+db_manager = DatabaseManager()
+summarizer_service = SummarizerService()
+
+# --- Ciclo de Vida (Inicio y Fin) ---
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Iniciando aplicación y conectando a PostgreSQL...")
+    db_manager.create_tables()
+    print("Tablas de BD verificadas/creadas.")
+    
+    app.state.db_manager = db_manager
+    
+    await summarizer_service.initialize()
+    app.state.summarizer_service = summarizer_service
+    
+    yield
+    
+    print("Apagando y limpiando conexiones...")
+    await summarizer_service.close()
+    await db_manager.close()
+
 # --- Inicialización de FastAPI ---
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    version=settings.VERSION
+    version=settings.VERSION,
+    lifespan=lifespan
 )
 
-# --- Inicialización de Servicios ---
-
-db_manager = DatabaseManager()
-summarizer_service = SummarizerService()
-
 # --- Middleware CORS ---
 
 origins = settings.CORS_ORIGINS.split(',')
@@ -43,25 +65,17 @@ def get_db():
     finally:
         db.close()
 
-# --- Eventos de Inicio y Fin ---
-
-@app.on_event("startup")
-def startup_event():
-    print("Iniciando aplicación y conectando a PostgreSQL...")
-    db_manager.create_tables()
-    print("Tablas de BD verificadas/creadas.")
-
-@app.on_event("shutdown")
-def shutdown_event():
-    print("Apagando y limpiando conexiones...")
-    pass
-
 # --- Rutas de Sesión y Salud ---
 
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "db_status": "connected", "ml_service_status": "ready"}
 
+@app.get("/metrics")
+async def metrics():
+    """Métricas del pool de conexiones hacia ml-core."""
+    return {"ml_core_client": summarizer_service.pool_stats()}
+
 @app.post("/session/start")
 async def start_session(db: DBSession = Depends(get_db)):
     session_handler = SessionHandler(db=db, redis_client=summarizer_service.cache_manager.redis)
@@ -70,8 +84,12 @@ async def start_session(db: DBSession = Depends(get_db)):
 
 @app.get("/session/{session_id}/history")
 async def get_history(session_id: str, db: DBSession = Depends(get_db)):
-    session_handler = SessionHandler(db=db, redis_client=summarizer_service.cache_manager.redis)
-    history = session_handler.get_session_history(session_id)
+    session_handler = SessionHandler(
+        db=db,
+        redis_client=summarizer_service.cache_manager.redis,
+        async_sessions=db_manager.AsyncSessionLocal
+    )
+    history = await session_handler.get_session_history_async(session_id)
     return {"history": history}
 
 # --- INCLUSIÓN DEL ROUTER MODULAR ---
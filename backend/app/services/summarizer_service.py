@@ -0,0 +1,220 @@
+import httpx
+from fastapi import UploadFile, HTTPException
+from typing import Optional, Literal, Dict, Any, AsyncIterator, Tuple
+
+from database.cache_manager import CacheManager
+from database.session_handler import SessionHandler
+from database.models import Document, Quiz 
+
+from core.config import settings
+import uuid
+import json
+import time
+import asyncio
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _multipart_stream(file: UploadFile, fields: Dict[str, str]) -> Tuple[Dict[str, str], AsyncIterator[bytes]]:
+    """
+    Arma el cuerpo multipart/form-data como un generador asíncrono que lee el
+    UploadFile por bloques, de modo que el PDF nunca se carga entero en memoria.
+    Devuelve las cabeceras (con Content-Length si se conoce el tamaño) y el cuerpo.
+    """
+    boundary = uuid.uuid4().hex
+    
+    head = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    )
+    filename = (file.filename or "document.pdf").replace('"', "")
+    head += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: {file.content_type or "application/octet-stream"}\r\n\r\n'
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    if file.size is not None:
+        # Con el tamaño conocido, ml-core puede rechazar archivos grandes antes de recibirlos.
+        headers["Content-Length"] = str(len(head) + file.size + len(tail))
+    
+    async def body() -> AsyncIterator[bytes]:
+        yield head
+        await file.seek(0)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+        yield tail
+    
+    return headers, body()
+
+
+class SummarizerService:
+    def __init__(self):
+        self.cache_manager = CacheManager()
+        self.ml_core_url = settings.ML_CORE_URL 
+        self.http_client: Optional[httpx.AsyncClient] = None
+        
+        # Timeouts por ruta: la conexión falla rápido, la lectura espera al LLM.
+        self.timeouts = {
+            route: httpx.Timeout(seconds, connect=settings.ML_CORE_CONNECT_TIMEOUT_SECONDS)
+            for route, seconds in {
+                "pdf": settings.ML_CORE_PDF_TIMEOUT_SECONDS,
+                "video": settings.ML_CORE_VIDEO_TIMEOUT_SECONDS,
+                "quiz": settings.ML_CORE_QUIZ_TIMEOUT_SECONDS
+            }.items()
+        }
+        self.requests_total = 0
+        self.requests_in_flight = 0
+        self.request_errors = 0
+        self.total_request_seconds = 0.0
+        self.http2_enabled = False
+        
+    async def initialize(self):
+        """Inicializa recursos pesados de forma asíncrona."""
+        http2 = settings.ML_CORE_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("HTTP/2 solicitado pero el paquete 'h2' no está instalado; se usa HTTP/1.1.")
+                http2 = False
+        self.http2_enabled = http2
+        
+        # Un único cliente por proceso: las llamadas reutilizan conexiones
+        # keep-alive calientes hacia ml-core en lugar de abrir una por request.
+        self.http_client = httpx.AsyncClient(
+            base_url=self.ml_core_url,
+            http2=http2,
+            timeout=self.timeouts["pdf"],
+            limits=httpx.Limits(
+                max_connections=settings.ML_CORE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ML_CORE_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.ML_CORE_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+
+    async def close(self):
+        """Cierra recursos al apagar la aplicación."""
+        if self.http_client:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    async def _post(self, path: str, route: str, **kwargs) -> httpx.Response:
+        """POST a ml-core con el timeout de la ruta, registrando métricas."""
+        # Asegura que el cliente httpx exista antes de usarlo
+        if not self.http_client:
+            raise RuntimeError("HTTP client no inicializado.")
+        
+        started_at = time.perf_counter()
+        self.requests_total += 1
+        self.requests_in_flight += 1
+        try:
+            response = await self.http_client.post(path, timeout=self.timeouts[route], **kwargs)
+            if response.status_code >= 500:
+                self.request_errors += 1
+            return response
+        except httpx.RequestError:
+            self.request_errors += 1
+            raise
+        finally:
+            self.requests_in_flight -= 1
+            self.total_request_seconds += time.perf_counter() - started_at
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Estado del pool de conexiones hacia ml-core para monitoreo."""
+        stats = {
+            "requests_total": self.requests_total,
+            "requests_in_flight": self.requests_in_flight,
+            "request_errors": self.request_errors,
+            "http2_enabled": self.http2_enabled,
+            "avg_request_seconds": round(self.total_request_seconds / self.requests_total, 4) if self.requests_total else 0.0,
+            "max_connections": settings.ML_CORE_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.ML_CORE_MAX_KEEPALIVE_CONNECTIONS
+        }
+        
+        # httpx no expone el pool públicamente; se lee del transporte de httpcore.
+        pool = getattr(getattr(self.http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        stats.update({
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for conn in connections if conn.is_idle())
+        })
+        return stats
+
+    async def analyze_pdf_request(
+        self,
+        file: UploadFile,
+        session_id: str
+    ) -> Dict[str, Any]:
+        
+        try:
+            # El PDF se reenvía por bloques a ml-core en lugar de leerse entero.
+            headers, body = _multipart_stream(file, {"session_id": session_id})
+            response = await self._post(
+                "/analyze/pdf", 
+                "pdf",
+                content=body, 
+                headers=headers
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            
+            if result.get("error"):
+                raise HTTPException(status_code=400, detail=f"ML Service error: {result['error']}")
+            
+            return result
+            
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(
+                status_code=503, 
+                detail=f"Error en el microservicio ML. Respuesta: {e.response.json().get('detail', 'Error desconocido')}"
+            )
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=503, 
+                detail="El Microservicio de Arquitectura ML no está disponible."
+            )
+        
+
+    async def analyze_video_request(self, youtube_url: str, session_id: str) -> Dict[str, Any]:
+        try:
+            response = await self._post(
+                "/analyze/video", 
+                "video",
+                json={"url": youtube_url, "session_id": session_id}
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            
+            if result.get("error"):
+                raise HTTPException(status_code=400, detail=f"ML Service error: {result['error']}")
+            
+            return result
+            
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=503, 
+                detail="El Microservicio de Arquitectura ML no está disponible."
+            )
+
+    async def generate_quiz_request(self, document_id: int) -> Dict[str, Any]:
+        try:
+            response = await self._post(f"/generate/quiz/{document_id}", "quiz")
+            response.raise_for_status()
+            
+            result = response.json()
+            
+            if result.get("error"):
+                raise HTTPException(status_code=400, detail=f"ML Service error: {result['error']}")
+            
+            return result
+            
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=503, 
+                detail="El Microservicio de Arquitectura ML no está disponible."
+            )
\ No newline at end of file
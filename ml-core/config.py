@@ -25,14 +25,72 @@ class Settings:
     DEFAULT_LLM_MODEL: str = os.getenv("DEFAULT_LLM_MODEL", "gpt-4o")
     FALLBACK_LLM_MODEL: str = "gpt-4o-mini"
     
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+    LLM_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "10"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    
     MAX_CHUNK_SIZE: int = int(os.getenv("MAX_CHUNK_SIZE", "3000"))
     CHUNK_OVERLAP: int = 200
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "200"))
+    CHUNKING_MODE: str = os.getenv("CHUNKING_MODE", "tokens")
+    
+    MAP_CONCURRENCY: int = int(os.getenv("MAP_CONCURRENCY", "5"))
+    CHUNK_MAX_RETRIES: int = int(os.getenv("CHUNK_MAX_RETRIES", "2"))
+    CHUNK_RETRY_BACKOFF_SECONDS: float = float(os.getenv("CHUNK_RETRY_BACKOFF_SECONDS", "1.0"))
+    
+    REDUCE_STRATEGY: str = os.getenv("REDUCE_STRATEGY", "tree")
+    REDUCE_TOKEN_BUDGET: int = int(os.getenv("REDUCE_TOKEN_BUDGET", "6000"))
+    
+    ROUTING_POLICY: str = os.getenv("ROUTING_POLICY", "balanced")
+    ROUTING_MODELS: list[str] = [
+        m.strip() for m in os.getenv("ROUTING_MODELS", DEFAULT_LLM_MODEL).split(",") if m.strip()
+    ]
     
     CACHE_TTL_SUMMARY: int = 3600
     CACHE_TTL_QUIZ: int = 1800
+    CACHE_TTL_CHUNK_SUMMARY: int = int(os.getenv("CACHE_TTL_CHUNK_SUMMARY", "604800"))
+    CACHE_TTL_VIDEO_INFO: int = int(os.getenv("CACHE_TTL_VIDEO_INFO", "86400"))
+    VIDEO_INFO_CACHE_MAX_ENTRIES: int = int(os.getenv("VIDEO_INFO_CACHE_MAX_ENTRIES", "256"))
+    CACHE_TTL_LLM_RESPONSE: int = int(os.getenv("CACHE_TTL_LLM_RESPONSE", "86400"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    
+    ANALYSIS_LOCK_TTL: int = int(os.getenv("ANALYSIS_LOCK_TTL", "900"))
+    ANALYSIS_LOCK_POLL_SECONDS: float = float(os.getenv("ANALYSIS_LOCK_POLL_SECONDS", "1.0"))
     
     MAX_FILE_SIZE_MB: int = 50
+    
+    CPU_EXECUTOR_WORKERS: int = int(os.getenv("CPU_EXECUTOR_WORKERS", "2"))
+    CPU_EXECUTOR_MAX_QUEUE: int = int(os.getenv("CPU_EXECUTOR_MAX_QUEUE", "32"))
+    PDF_EXTRACTION_WORKERS: int = int(os.getenv("PDF_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+    PDF_STREAMING_MIN_MB: float = float(os.getenv("PDF_STREAMING_MIN_MB", "10"))
+    PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+    EXTRACTION_CACHE_DIR: Path = Path(os.getenv("EXTRACTION_CACHE_DIR", str(UPLOADS_DIR / "extraction_cache")))
+    EXTRACTION_CACHE_MAX_MB: float = float(os.getenv("EXTRACTION_CACHE_MAX_MB", "500"))
     MAX_VIDEO_DURATION_MINUTES: int = 120
+    VIDEO_IO_WORKERS: int = int(os.getenv("VIDEO_IO_WORKERS", "8"))
+    VIDEO_IO_MAX_QUEUE: int = int(os.getenv("VIDEO_IO_MAX_QUEUE", "64"))
+    
+    # Preprocesamiento del audio antes de Whisper (mono, Opus, sin silencios largos).
+    AUDIO_PREPROCESS: bool = os.getenv("AUDIO_PREPROCESS", "true").lower() == "true"
+    AUDIO_BITRATE_KBPS: int = int(os.getenv("AUDIO_BITRATE_KBPS", "24"))
+    AUDIO_SAMPLE_RATE: int = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+    AUDIO_TRIM_SILENCE: bool = os.getenv("AUDIO_TRIM_SILENCE", "true").lower() == "true"
+    AUDIO_SILENCE_DB: float = float(os.getenv("AUDIO_SILENCE_DB", "-40"))
+    AUDIO_MIN_SILENCE_SECONDS: float = float(os.getenv("AUDIO_MIN_SILENCE_SECONDS", "1.0"))
+    AUDIO_KEEP_SILENCE_SECONDS: float = float(os.getenv("AUDIO_KEEP_SILENCE_SECONDS", "0.6"))
+    AUDIO_SPEEDUP: float = float(os.getenv("AUDIO_SPEEDUP", "1.0"))
+    
+    # Transcripción con Whisper: vacío usa la API de OpenAI.
+    WHISPER_BASE_URL: str = os.getenv("WHISPER_BASE_URL", "")
+    WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "whisper-1")
+    WHISPER_CONCURRENCY: int = int(os.getenv("WHISPER_CONCURRENCY", "4"))
+    WHISPER_SEGMENT_SECONDS: float = float(os.getenv("WHISPER_SEGMENT_SECONDS", "600"))
+    WHISPER_SEGMENT_OVERLAP_SECONDS: float = float(os.getenv("WHISPER_SEGMENT_OVERLAP_SECONDS", "2"))
+    WHISPER_SILENCE_SEARCH_SECONDS: float = float(os.getenv("WHISPER_SILENCE_SEARCH_SECONDS", "30"))
+    WHISPER_SILENCE_NOISE_DB: float = float(os.getenv("WHISPER_SILENCE_NOISE_DB", "-35"))
+    WHISPER_SILENCE_MIN_SECONDS: float = float(os.getenv("WHISPER_SILENCE_MIN_SECONDS", "0.5"))
     
     SUPPORTED_PDF_EXTENSIONS: list[str] = [".pdf"]
     SUPPORTED_VIDEO_PLATFORMS: list[str] = ["youtube.com", "youtu.be"]
@@ -1,20 +1,27 @@
+import os
 import json
+import asyncio
 import hashlib
-import tiktoken
-from typing import Optional, Literal
-from openai import OpenAI
-from anthropic import Anthropic
+import threading
+import httpx
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from typing import Iterator, Optional, Literal
+from openai import AsyncOpenAI
+from anthropic import AsyncAnthropic
 
 from prompts.pdf_prompts import (
     get_pdf_summary_prompt,
     get_chunk_summary_prompt,
     get_combine_summaries_prompt,
+    get_partial_combine_summaries_prompt,
     get_metadata_extraction_prompt
 )
 from prompts.video_prompts import (
     get_video_summary_prompt,
     get_video_chunk_summary_prompt,
-    get_combine_video_summaries_prompt
+    get_combine_video_summaries_prompt,
+    get_partial_combine_video_summaries_prompt
 )
 from prompts.quiz_prompts import (
     get_quiz_for_video_prompt,
@@ -24,110 +31,177 @@ from prompts.quiz_prompts import (
 
 from processing.pdf_processor import PDFProcessor
 from processing.video_processor import VideoProcessor
-from processing.text_chunker import TextChunker
+from processing.text_chunker import TextChunker, get_encoding
+from processing.cpu_executor import BoundedExecutor
+from processing.video_info_cache import VideoInfoCache
+from processing.video_processor import extract_video_id, canonical_video_url
 
 from database.db_manager import DatabaseManager
 from database.cache_manager import CacheManager
 from database.session_handler import SessionHandler
+from database.transcript_store import TranscriptStore
 from database.models import Document, Quiz
 
+from models.response_cache import ResponseCache
+from models.model_router import ModelRouter
+
 from config import settings
 
 
+# Versión de las plantillas de resumen por fragmento: forma parte de la clave
+# de los resúmenes cacheados, así un cambio de prompt no reutiliza los viejos.
+CHUNK_PROMPT_VERSION = 2
+
+
 def count_tokens(text: str, model_name: str = "gpt-4") -> int:
-    model_encoding_map = {
-        "gpt-4": "cl100k_base",
-        "gpt-4o": "o200k_base",
-        "gpt-4o-mini": "o200k_base",
-        "gpt-3.5-turbo": "cl100k_base",
-        "claude-3-5-sonnet": "cl100k_base",
-    }
-    
-    try:
-        encoding_name = model_encoding_map.get(model_name, "cl100k_base")
-        encoding = tiktoken.get_encoding(encoding_name)
-    except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
-    
-    return len(encoding.encode(text))
+    return len(get_encoding(model_name).encode(text))
 
 
 class AIService:
     def __init__(self):
-        self.openai = OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.anthropic = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        # Clientes asíncronos con un pool de conexiones propio por proveedor,
+        # compartido por todas las llamadas del worker.
+        self.llm_timeout = httpx.Timeout(
+            settings.LLM_TIMEOUT_SECONDS,
+            connect=settings.LLM_CONNECT_TIMEOUT_SECONDS
+        )
+        self.openai = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=self._build_http_client()
+        )
+        self.anthropic = AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            http_client=self._build_http_client()
+        )
 
         self.pdf_handler = PDFProcessor()
         self.video_handler = VideoProcessor()
         self.text_chunker = TextChunker()
+        self.cpu_executor = BoundedExecutor(
+            max_workers=settings.CPU_EXECUTOR_WORKERS,
+            max_queue=settings.CPU_EXECUTOR_MAX_QUEUE
+        )
 
         self.db = DatabaseManager()
         self.cache = CacheManager()
+        self.response_cache = ResponseCache(
+            self.cache,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl=settings.CACHE_TTL_LLM_RESPONSE
+        )
+        self.video_info_cache = VideoInfoCache(
+            self.cache,
+            max_entries=settings.VIDEO_INFO_CACHE_MAX_ENTRIES,
+            ttl=settings.CACHE_TTL_VIDEO_INFO
+        )
+        self.router = ModelRouter(settings)
         self.sessions = SessionHandler(
             db=self.db.get_session(),
-            redis_client=self.cache.redis
+            redis_client=self.cache.redis,
+            async_sessions=self.db.AsyncSessionLocal
         )
+        self.transcripts = TranscriptStore(self.db.AsyncSessionLocal)
 
         self.default_model = settings.DEFAULT_LLM_MODEL
         self.max_chunk_size = settings.MAX_CHUNK_SIZE
+        self.chunking_mode = settings.CHUNKING_MODE
+        self.chunk_summary_ttl = settings.CACHE_TTL_CHUNK_SUMMARY
+        self.streaming_min_bytes = settings.PDF_STREAMING_MIN_MB * 1024 * 1024
+        self.map_concurrency = settings.MAP_CONCURRENCY
+        self.chunk_max_retries = settings.CHUNK_MAX_RETRIES
+        self.chunk_retry_backoff = settings.CHUNK_RETRY_BACKOFF_SECONDS
+        self.reduce_strategy = settings.REDUCE_STRATEGY
+        self.reduce_token_budget = settings.REDUCE_TOKEN_BUDGET
+        self.analysis_lock_ttl = settings.ANALYSIS_LOCK_TTL
+        self.analysis_lock_poll = settings.ANALYSIS_LOCK_POLL_SECONDS
+        self._inflight: dict[str, asyncio.Task] = {}
+
+
+    def _build_http_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.llm_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+
 
+    async def close(self):
+        await self.openai.close()
+        await self.anthropic.close()
+        await self.db.close()
+        await self.video_handler.close()
+        self.pdf_handler.close()
+        self.cpu_executor.shutdown()
+
+
+    async def analyze_pdf(self, file_path: str, session_id: str, filename: str = "document.pdf",
+                          file_hash: Optional[str] = None) -> dict:
+        # Si el mismo archivo ya se analizó, el hash de sus bytes lleva al hash
+        # del contenido y el duplicado se detecta sin parsear el PDF.
+        if file_hash:
+            known_content_hash = self.cache.get_content_hash_for_file(file_hash)
+            existing_doc = known_content_hash and await self.sessions.check_duplicate_hash_async(known_content_hash, session_id)
+            if existing_doc:
+                print("Archivo ya analizado en esta sesión.")
+                return self._existing_document_response(existing_doc)
+
+        if os.path.getsize(file_path) >= self.streaming_min_bytes:
+            return await self._analyze_pdf_streaming(file_path, session_id, filename, file_hash)
 
-    async def analyze_pdf(self, file_path: str, session_id: str, filename: str = "document.pdf") -> dict:
         try:
             print(f"Extrayendo texto de {filename}...")
-            extracted_text = self.pdf_handler.extract_text(file_path)
+            extraction = await self.cpu_executor.run(self.pdf_handler.extract_document, file_path, file_hash)
+            extracted_text = extraction["text"]
+            extraction_metadata = {
+                "page_count": extraction["page_count"],
+                "extraction_backends": {
+                    backend: extraction["page_backends"].count(backend)
+                    for backend in set(extraction["page_backends"])
+                }
+            }
 
             if not extracted_text or len(extracted_text) < 100:
                 return {"error": "El PDF no contiene suficiente texto."}
 
-            content_hash = hashlib.sha256(extracted_text.encode()).hexdigest()
+            content_hash = await self.cpu_executor.run(self._hash_text, extracted_text)
+            self.cache.cache_file_content_hash(extraction["file_hash"], content_hash)
 
             print("Verificando duplicados...")
-            existing_doc = self.sessions.check_duplicate(extracted_text, session_id)
+            existing_doc = await self.sessions.check_duplicate_hash_async(content_hash, session_id)
             if existing_doc:
                 print("Documento encontrado en la base de datos.")
-                return {
-                    "document_id": existing_doc.id,
-                    "title": existing_doc.title,
-                    "summary_short": existing_doc.summary_short,
-                    "summary_medium": existing_doc.summary_medium,
-                    "summary_long": json.loads(existing_doc.summary_long),
-                    "key_concepts": existing_doc.metadata.get("key_concepts", []),
-                    "cached": True
-                }
+                return self._existing_document_response(existing_doc)
 
             cached_summary = self.cache.get_cached_summary(content_hash)
             if cached_summary:
                 print("Resumen encontrado en caché.")
-                doc = self._save_document(
+                doc = await self._save_document(
                     session_id=session_id,
                     doc_type="pdf",
                     title=filename,
                     content_hash=content_hash,
                     raw_content=extracted_text,
-                    summary=cached_summary
+                    summary=cached_summary,
+                    metadata=extraction_metadata
                 )
                 return {**cached_summary, "document_id": doc.id, "cached": True}
 
-            print("Contando tokens...")
-            token_count = count_tokens(extracted_text, self.default_model)
-            print(f"Total de tokens: {token_count}")
-
-            print("Generando resumen con modelo...")
-            if token_count > self.max_chunk_size:
-                summary = await self._long_doc_summary(extracted_text, filename, token_count)
-            else:
-                summary = await self._short_doc_summary(extracted_text, filename)
-
-            self.cache.cache_summary(content_hash, summary, ttl=3600)
+            summary = await self._single_flight(
+                content_hash,
+                compute=lambda: self._summarize_pdf(extracted_text, filename, content_hash),
+                lookup=lambda: self.cache.get_cached_summary(content_hash)
+            )
 
-            doc = self._save_document(
+            doc = await self._save_document(
                 session_id=session_id,
                 doc_type="pdf",
                 title=summary.get("title", filename),
                 content_hash=content_hash,
                 raw_content=extracted_text,
-                summary=summary
+                summary=summary,
+                metadata=extraction_metadata
             )
 
             print(f"PDF procesado correctamente (ID: {doc.id})")
@@ -138,16 +212,168 @@ class AIService:
             return {"error": str(e)}
 
 
+    async def _analyze_pdf_streaming(self, file_path: str, session_id: str, filename: str,
+                                     file_hash: Optional[str] = None) -> dict:
+        # PDFs grandes: una primera pasada extrae y limpia las páginas hacia el
+        # caché de extracción y mide el documento sin armar su texto. Con el
+        # hash y los tokens ya conocidos, el documento sigue el mismo camino que
+        # el resto (duplicados, caché, coalescencia y router) antes de pagar
+        # por ninguna llamada al modelo.
+        try:
+            print(f"Extrayendo {filename} por streaming...")
+            stats = await self.cpu_executor.run(
+                self.pdf_handler.scan_document, file_path, file_hash, self.default_model
+            )
+
+            if stats["word_count"] < 20:
+                return {"error": "El PDF no contiene suficiente texto."}
+
+            content_hash = stats["content_hash"]
+            self.cache.cache_file_content_hash(stats["file_hash"], content_hash)
+            extraction_metadata = {
+                "page_count": stats["page_count"],
+                "extraction_backends": {
+                    backend: stats["page_backends"].count(backend)
+                    for backend in set(stats["page_backends"])
+                }
+            }
+
+            existing_doc = await self.sessions.check_duplicate_hash_async(content_hash, session_id)
+            if existing_doc:
+                print("Documento encontrado en la base de datos.")
+                return self._existing_document_response(existing_doc)
+
+            summary = self.cache.get_cached_summary(content_hash)
+            cached = summary is not None
+
+            if not cached:
+                summary = await self._single_flight(
+                    content_hash,
+                    compute=lambda: self._summarize_pdf_streaming(file_path, filename, content_hash, stats),
+                    lookup=lambda: self.cache.get_cached_summary(content_hash)
+                )
+
+            # El texto completo no se conserva en este modo (raw_content es opcional).
+            doc = await self._save_document(
+                session_id=session_id,
+                doc_type="pdf",
+                title=summary.get("title", filename),
+                content_hash=content_hash,
+                raw_content=None,
+                summary=summary,
+                metadata=extraction_metadata
+            )
+
+            print(f"PDF procesado correctamente (ID: {doc.id})")
+            return {**summary, "document_id": doc.id, "cached": cached}
+
+        except Exception as e:
+            print(f"Error al procesar PDF: {e}")
+            return {"error": str(e)}
+
+
+    async def _summarize_pdf_streaming(self, file_path: str, filename: str, content_hash: str, stats: dict) -> dict:
+        # Otra réplica pudo terminar el mismo documento mientras esperábamos el lock.
+        cached_summary = self.cache.get_cached_summary(content_hash)
+        if cached_summary:
+            return cached_summary
+
+        print(f"Total de tokens: {stats['token_count']}")
+        route = self.router.route(stats["token_count"])
+        print(f"Generando resumen con modelo ({route['strategy']}, {route['model']})...")
+
+        if route["strategy"] == "map_reduce":
+            # Segunda pasada sobre el caché: cada fragmento se resume apenas sale.
+            chunks = self._iter_chunk_content(
+                self.pdf_handler.iter_page_texts(file_path, stats["file_hash"]),
+                stats["token_count"], stats["word_count"]
+            )
+            chunk_summaries = await self._summarize_chunk_stream(
+                chunks, get_chunk_summary_prompt, "pdf", model=route["model"]
+            )
+            print(f"{len(chunk_summaries)} partes resumidas.")
+
+            reduced = await self._reduce_summaries(
+                chunk_summaries, filename, get_partial_combine_summaries_prompt, model=route["model"]
+            )
+            stages = await self._run_stages({
+                "metadata": ([], lambda _: self._run_model(
+                    get_metadata_extraction_prompt(stats["head"]), response_format="json", model=route["model"]
+                )),
+                "final_summary": ([], lambda _: self._run_model(
+                    get_combine_summaries_prompt(reduced, filename), response_format="json", model=route["model"]
+                ))
+            })
+            metadata = stages["metadata"]
+            summary = stages["final_summary"]
+            summary.setdefault("document_type", metadata.get("document_type", "other"))
+            summary.setdefault("estimated_reading_time", max(1, stats["word_count"] // 200))
+            summary["metadata"] = metadata
+        else:
+            # Cabe en la ventana del modelo elegido: el texto se lee del caché de extracción.
+            extraction = await self.cpu_executor.run(self.pdf_handler.extract_document, file_path, stats["file_hash"])
+            summary = await self._short_doc_summary(extraction["text"], filename, model=route["model"])
+
+        self.cache.cache_summary(content_hash, summary, ttl=3600)
+        return summary
+
+
+    @staticmethod
+    def _existing_document_response(existing_doc: Document) -> dict:
+        return {
+            "document_id": existing_doc.id,
+            "title": existing_doc.title,
+            "summary_short": existing_doc.summary_short,
+            "summary_medium": existing_doc.summary_medium,
+            "summary_long": json.loads(existing_doc.summary_long),
+            "key_concepts": existing_doc.metadata.get("key_concepts", []),
+            "cached": True
+        }
+
+
+    async def _summarize_pdf(self, extracted_text: str, filename: str, content_hash: str) -> dict:
+        # Otra réplica pudo terminar el mismo documento mientras esperábamos el lock.
+        cached_summary = self.cache.get_cached_summary(content_hash)
+        if cached_summary:
+            return cached_summary
+
+        print("Contando tokens...")
+        token_count = await self.cpu_executor.run(count_tokens, extracted_text, self.default_model)
+        print(f"Total de tokens: {token_count}")
+
+        route = self.router.route(token_count)
+        print(f"Generando resumen con modelo ({route['strategy']}, {route['model']})...")
+        if route["strategy"] == "map_reduce":
+            summary = await self._long_doc_summary(extracted_text, filename, token_count, model=route["model"])
+        else:
+            summary = await self._short_doc_summary(extracted_text, filename, model=route["model"])
+
+        self.cache.cache_summary(content_hash, summary, ttl=3600)
+        return summary
+
+
     async def analyze_video(self, youtube_url: str, session_id: str) -> dict:
         try:
             print("Obteniendo información del video...")
-            video_info = self.video_handler.get_video_info(youtube_url)
-
-            db_session = self.db.get_session()
-            existing_doc = db_session.query(Document).filter(
-                Document.session_id == session_id,
-                Document.source_url == youtube_url
-            ).first()
+            # Los metadatos se piden en segundo plano: la búsqueda de duplicados,
+            # de transcripciones y de subtítulos avanza con el ID de la URL.
+            info_task = asyncio.create_task(self._get_video_info(youtube_url))
+            info_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+            video_id = extract_video_id(youtube_url)
+            if not video_id:
+                video_id = (await info_task).get("video_id")
+            # youtu.be/X, watch?v=X&t=30, shorts/X... se guardan bajo una sola URL.
+            source_url = canonical_video_url(video_id) if video_id else youtube_url
+
+            async with self.db.get_async_session() as db_session:
+                result = await db_session.execute(
+                    select(Document).where(
+                        Document.session_id == session_id,
+                        Document.source_url.in_([source_url, youtube_url])
+                    ).limit(1)
+                )
+                existing_doc = result.scalars().first()
 
             if existing_doc:
                 print("Video ya procesado anteriormente.")
@@ -157,60 +383,52 @@ class AIService:
                     "summary_short": existing_doc.summary_short,
                     "summary_medium": existing_doc.summary_medium,
                     "summary_long": json.loads(existing_doc.summary_long),
-                    "video_url": youtube_url,
+                    "video_url": source_url,
                     "duration": existing_doc.metadata.get("duration"),
                     "cached": True
                 }
 
-            print("Transcribiendo audio...")
-            try:
-                transcript = await self.video_handler.transcribe_video(youtube_url)
-            except Exception as transcribe_error:
-                return {"error": f"Error al transcribir video: {str(transcribe_error)}"}
-
-            if not transcript or len(transcript) < 100:
-                return {"error": "No se pudo obtener una transcripción válida del video."}
-
-            content_hash = hashlib.sha256(transcript.encode()).hexdigest()
-            cached_summary = self.cache.get_cached_summary(content_hash)
+            video_key = f"video:{video_id or youtube_url}"
+            result = await self._single_flight(
+                video_key,
+                compute=lambda: self._summarize_video(youtube_url, video_id, info_task, video_key),
+                lookup=lambda: self.cache.get_cached_summary(video_key)
+            )
+            video_info = await info_task
+            transcript = result["transcript"]
+            content_hash = result["content_hash"]
+            summary = result["summary"]
+            audio_metadata = (
+                {"audio_preprocessing": result["audio_preprocessing"]}
+                if result.get("audio_preprocessing") else {}
+            )
 
-            if cached_summary:
+            if result["cached"]:
                 print("Resumen de transcripción encontrado en caché.")
-                doc = self._save_document(
+                doc = await self._save_document(
                     session_id=session_id,
                     doc_type="video",
                     title=video_info["title"],
                     content_hash=content_hash,
                     raw_content=transcript,
-                    summary=cached_summary,
-                    source_url=youtube_url,
-                    metadata={"duration": video_info.get("duration")}
+                    summary=summary,
+                    source_url=source_url,
+                    metadata={"duration": video_info.get("duration"), **audio_metadata}
                 )
-                return {**cached_summary, "document_id": doc.id, "cached": True}
-
-            print("Contando tokens...")
-            token_count = count_tokens(transcript, self.default_model)
-            print(f"Total de tokens: {token_count}")
-
-            print("Generando resumen del video...")
-            if token_count > self.max_chunk_size:
-                summary = await self._long_video_summary(transcript, video_info["title"], video_info.get("duration"), token_count)
-            else:
-                summary = await self._short_video_summary(transcript, video_info["title"], video_info.get("duration"))
+                return {**summary, "document_id": doc.id, "cached": True}
 
-            self.cache.cache_summary(content_hash, summary, ttl=3600)
-
-            doc = self._save_document(
+            doc = await self._save_document(
                 session_id=session_id,
                 doc_type="video",
                 title=summary.get("title", video_info["title"]),
                 content_hash=content_hash,
                 raw_content=transcript,
                 summary=summary,
-                source_url=youtube_url,
+                source_url=source_url,
                 metadata={
                     "duration": video_info.get("duration"),
-                    "channel": video_info.get("channel")
+                    "channel": video_info.get("channel"),
+                    **audio_metadata
                 }
             )
 
@@ -218,7 +436,7 @@ class AIService:
             return {
                 **summary,
                 "document_id": doc.id,
-                "video_url": youtube_url,
+                "video_url": source_url,
                 "duration": video_info.get("duration"),
                 "cached": False
             }
@@ -228,10 +446,148 @@ class AIService:
             return {"error": str(e)}
 
 
+    async def _get_video_info(self, youtube_url: str) -> dict:
+        # Metadatos por ID canónico: una sola extracción con yt_dlp por video
+        # mientras dure el TTL, compartida entre sesiones y réplicas.
+        video_id = extract_video_id(youtube_url)
+        video_info = await self.video_info_cache.get(video_id) if video_id else None
+        if video_info:
+            return video_info
+
+        video_info = await self.video_handler.fetch_video_info(youtube_url)
+        if video_info.get("video_id"):
+            await self.video_info_cache.set(video_info["video_id"], video_info)
+        return video_info
+
+
+    async def _summarize_video(self, youtube_url: str, video_id: Optional[str], info_task: asyncio.Task, video_key: str) -> dict:
+        # Resultado completo por video (transcripción + resumen) para que las
+        # réplicas que esperaban el lock no vuelvan a transcribir.
+        cached_result = self.cache.get_cached_summary(video_key)
+        if cached_result:
+            return {**cached_result, "cached": True}
+
+        # Transcripciones compartidas entre sesiones: un video popular se
+        # transcribe (y pasa por Whisper) una sola vez.
+        languages = self.video_handler.preferred_languages
+        stored = await self.transcripts.get(video_id, languages) if video_id else None
+        audio_preprocessing = None
+
+        if stored:
+            print(f"Transcripción almacenada reutilizada ({stored['source']}, {stored['language']}).")
+            transcript = stored["text"]
+        else:
+            print("Transcribiendo audio...")
+            try:
+                transcription = await self.video_handler.transcribe(youtube_url, video_id=video_id)
+            except Exception as transcribe_error:
+                raise ValueError(f"Error al transcribir video: {str(transcribe_error)}")
+            transcript = transcription["text"]
+            if transcription.get("audio"):
+                # Ahorro del preprocesamiento de audio (la ruta temporal ya no existe).
+                audio_preprocessing = {
+                    key: value for key, value in transcription["audio"].items() if key != "path"
+                }
+
+            if transcript and len(transcript) >= 100 and video_id:
+                await self.transcripts.save(video_id, transcription["language"], transcription["source"], transcript)
+
+        if not transcript or len(transcript) < 100:
+            raise ValueError("No se pudo obtener una transcripción válida del video.")
+
+        video_info = await info_task
+
+        content_hash = await self.cpu_executor.run(self._hash_text, transcript)
+        summary = self.cache.get_cached_summary(content_hash)
+        cached = summary is not None
+
+        if not cached:
+            print("Contando tokens...")
+            token_count = await self.cpu_executor.run(count_tokens, transcript, self.default_model)
+            print(f"Total de tokens: {token_count}")
+
+            # Los videos no llevan la llamada de metadatos de los PDFs.
+            route = self.router.route(token_count, with_metadata=False)
+            print(f"Generando resumen del video ({route['strategy']}, {route['model']})...")
+            if route["strategy"] == "map_reduce":
+                summary = await self._long_video_summary(
+                    transcript, video_info["title"], video_info.get("duration"), token_count, model=route["model"]
+                )
+            else:
+                summary = await self._short_video_summary(transcript, video_info["title"], video_info.get("duration"), model=route["model"])
+
+            self.cache.cache_summary(content_hash, summary, ttl=3600)
+
+        result = {
+            "transcript": transcript,
+            "content_hash": content_hash,
+            "summary": summary,
+            "audio_preprocessing": audio_preprocessing,
+            "cached": cached
+        }
+        # El informe de preprocesamiento describe esta transcripción: quien
+        # reutiliza el resultado no procesó audio, así que no se cachea.
+        self.cache.cache_summary(video_key, {**result, "audio_preprocessing": None}, ttl=3600)
+        return result
+
+
+    async def _single_flight(self, key: str, compute, lookup):
+        # Coalescencia de análisis idénticos. Dentro del proceso, las llegadas
+        # posteriores esperan la tarea en vuelo; entre réplicas, un lock en
+        # Redis hace que solo una ejecute el pipeline y el resto lea el caché.
+        inflight = self._inflight.get(key)
+        if inflight:
+            print("Análisis idéntico en curso, esperando su resultado...")
+            return await asyncio.shield(inflight)
+
+        task = asyncio.create_task(self._run_with_lock(key, compute, lookup))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: si un cliente cancela, el resto sigue esperando el mismo cómputo.
+        return await asyncio.shield(task)
+
+
+    async def _run_with_lock(self, key: str, compute, lookup):
+        lock_name = f"analysis:{key}"
+        # Si Redis no responde, acquire_lock devuelve igualmente un token (falla
+        # abierto): entre réplicas no hay coordinación y solo queda _inflight.
+        token = self.cache.acquire_lock(lock_name, ttl=self.analysis_lock_ttl)
+
+        while not token:
+            result = lookup()
+            if result:
+                print("Resultado obtenido de otra réplica.")
+                return result
+
+            await asyncio.sleep(self.analysis_lock_poll)
+            token = self.cache.acquire_lock(lock_name, ttl=self.analysis_lock_ttl)
+
+        heartbeat = asyncio.create_task(self._keep_lock_alive(lock_name, token))
+        try:
+            return await compute()
+        finally:
+            heartbeat.cancel()
+            self.cache.release_lock(lock_name, token)
+
+
+    async def _keep_lock_alive(self, lock_name: str, token: str):
+        # Un análisis largo (transcripción, map-reduce) puede superar el TTL: el
+        # dueño renueva el lock cada ttl/3 mientras el cómputo sigue en curso.
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.analysis_lock_ttl / 3)
+            extended = await loop.run_in_executor(
+                None, self.cache.extend_lock, lock_name, token, self.analysis_lock_ttl
+            )
+            if not extended:
+                print(f"No se pudo renovar el lock {lock_name}; otra réplica podría repetir el análisis.")
+                return
+
+
     async def generate_quiz(self, document_id: int, num_questions: int = 5, difficulty: Literal["easy", "medium", "hard"] = "medium") -> dict:
         try:
-            db_session = self.db.get_session()
-            document = db_session.query(Document).get(document_id)
+            async with self.db.get_async_session() as db_session:
+                document = await db_session.get(Document, document_id)
 
             if not document:
                 return {"error": f"Documento {document_id} no encontrado."}
@@ -256,12 +612,16 @@ class AIService:
             else:
                 prompt = get_quiz_for_pdf_prompt(summary, num_questions)
 
-            quiz_data = await self._run_model(prompt, response_format="json")
-
-            # Lógica de validación de calidad
-            validation_prompt = get_quiz_validation_prompt(quiz_data)
-            validation = await self._run_model(validation_prompt, response_format="json")
-            validation_score = validation.get("validation_score", 0)
+            # Lógica de validación de calidad: depende del quiz generado, el
+            # grafo permite sumar etapas independientes sin serializarlas.
+            stages = await self._run_stages({
+                "quiz": ([], lambda _: self._run_model(prompt, response_format="json", cacheable=False)),
+                "validation": (["quiz"], lambda deps: self._run_model(
+                    get_quiz_validation_prompt(deps["quiz"]), response_format="json", cacheable=False
+                ))
+            })
+            quiz_data = stages["quiz"]
+            validation_score = stages["validation"].get("validation_score", 0)
 
             quiz = Quiz(
                 document_id=document_id,
@@ -272,8 +632,10 @@ class AIService:
                     "validation_score": validation_score  # Guardar validation_score en metadata
                 }
             )
-            db_session.add(quiz)
-            db_session.commit()
+            # La sesión se abre solo para el insert, no durante las llamadas al LLM.
+            async with self.db.async_session_scope() as db_session:
+                db_session.add(quiz)
+                await db_session.flush()
 
             result = {
                 "quiz_id": quiz.id,
@@ -290,34 +652,39 @@ class AIService:
             return {"error": str(e)}
 
 
-    async def _short_doc_summary(self, content: str, title: str) -> dict:
-        metadata_prompt = get_metadata_extraction_prompt(content)
-        metadata = await self._run_model(metadata_prompt, response_format="json")
+    async def _short_doc_summary(self, content: str, title: str, model: Optional[str] = None) -> dict:
+        # Metadatos y resumen no dependen entre sí: se generan en paralelo.
+        stages = await self._run_stages({
+            "metadata": ([], lambda _: self._run_model(get_metadata_extraction_prompt(content), response_format="json", model=model)),
+            "summary": ([], lambda _: self._run_model(get_pdf_summary_prompt(content, title), response_format="json", model=model))
+        })
 
-        prompt = get_pdf_summary_prompt(content, title)
-        summary = await self._run_model(prompt, response_format="json")
-
-        summary["metadata"] = metadata
+        summary = stages["summary"]
+        summary["metadata"] = stages["metadata"]
         return summary
 
 
-    async def _long_doc_summary(self, content: str, title: str, token_count: int) -> dict:
-        metadata_prompt = get_metadata_extraction_prompt(content)
-        metadata = await self._run_model(metadata_prompt, response_format="json")
-
-        chunks = self.text_chunker.chunk_text(content, max_size=self.max_chunk_size)
+    async def _long_doc_summary(self, content: str, title: str, token_count: int, model: Optional[str] = None) -> dict:
+        chunks = await self.cpu_executor.run(self._chunk_content, content, token_count)
         print(f"Documento dividido en {len(chunks)} partes.")
 
-        
-        chunk_summaries = [
-            await self._run_model(get_chunk_summary_prompt(chunk, i, len(chunks)))
-            for i, chunk in enumerate(chunks)
-        ]
-        print(f"Todas las {len(chunks)} partes han sido resumidas.")
+        async def summarize_chunks(_) -> list[str]:
+            chunk_summaries = await self._summarize_chunks(chunks, get_chunk_summary_prompt, "pdf", model=model)
+            print(f"Todas las {len(chunks)} partes han sido resumidas.")
 
+            return await self._reduce_summaries(
+                chunk_summaries, title, get_partial_combine_summaries_prompt, model=model
+            )
 
-        combine_prompt = get_combine_summaries_prompt(chunk_summaries, title)
-        final_summary = await self._run_model(combine_prompt, response_format="json")
+        stages = await self._run_stages({
+            "metadata": ([], lambda _: self._run_model(get_metadata_extraction_prompt(content), response_format="json", model=model)),
+            "chunk_summaries": ([], summarize_chunks),
+            "final_summary": (["chunk_summaries"], lambda deps: self._run_model(
+                get_combine_summaries_prompt(deps["chunk_summaries"], title), response_format="json", model=model
+            ))
+        })
+        metadata = stages["metadata"]
+        final_summary = stages["final_summary"]
 
         final_summary.setdefault("document_type", metadata.get("document_type", "other"))
         final_summary.setdefault("estimated_reading_time", max(1, len(content.split()) // 200))
@@ -326,26 +693,31 @@ class AIService:
         return final_summary
 
 
-    async def _short_video_summary(self, transcript: str, title: str, duration: int = None) -> dict:
+    async def _short_video_summary(self, transcript: str, title: str, duration: int = None, model: Optional[str] = None) -> dict:
         prompt = get_video_summary_prompt(transcript, title, duration)
-        return await self._run_model(prompt, response_format="json")
+        return await self._run_model(prompt, response_format="json", model=model)
 
 
-    async def _long_video_summary(self, transcript: str, title: str, duration: int = None, token_count: int = 0) -> dict:
-        chunks = self.text_chunker.chunk_text(transcript, max_size=self.max_chunk_size)
+    async def _long_video_summary(self, transcript: str, title: str, duration: int = None, token_count: int = 0,
+                                  model: Optional[str] = None) -> dict:
+        chunks = await self.cpu_executor.run(self._chunk_content, transcript, token_count)
         print(f"Transcripción dividida en {len(chunks)} segmentos.")
 
-        
-        chunk_summaries = [
-            await self._run_model(get_video_chunk_summary_prompt(chunk, i, len(chunks), title))
-            for i, chunk in enumerate(chunks)
-        ]
-        
+        # El título entra en el prompt de cada segmento, así que también en la clave.
+        chunk_summaries = await self._summarize_chunks(
+            chunks,
+            lambda chunk: get_video_chunk_summary_prompt(chunk, title),
+            f"video:{self._hash_text(title)[:16]}",
+            model=model
+        )
         print(f"Todos los {len(chunks)} segmentos han sido resumidos.")
 
+        chunk_summaries = await self._reduce_summaries(
+            chunk_summaries, title, get_partial_combine_video_summaries_prompt, model=model
+        )
 
         combine_prompt = get_combine_video_summaries_prompt(chunk_summaries, title)
-        final_summary = await self._run_model(combine_prompt, response_format="json")
+        final_summary = await self._run_model(combine_prompt, response_format="json", model=model)
 
         if duration and not final_summary.get("estimated_watch_time"):
             final_summary["estimated_watch_time"] = duration // 60
@@ -353,9 +725,309 @@ class AIService:
         return final_summary
 
 
-    async def _run_model(self, prompt: dict, response_format: str = "text", model: Optional[str] = None) -> dict | str:
+    @staticmethod
+    def _hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+    def _chunk_content(self, content: str, token_count: Optional[int] = None) -> list[dict]:
+        # Cada fragmento lleva el hash de su contenido para reutilizar su resumen.
+        if self.chunking_mode == "tokens":
+            # Los fragmentos ya vienen medidos en tokens reales del modelo.
+            chunks = [
+                chunk["text"]
+                for chunk in self.text_chunker.chunk_by_tokens(content, self.max_chunk_size, self.default_model)
+            ]
+        else:
+            token_count = token_count or count_tokens(content, self.default_model)
+            max_words = self._word_budget(token_count, len(content.split()))
+            if self.chunking_mode == "cdc":
+                return self.text_chunker.chunk_content_defined(content, max_words)
+            chunks = self.text_chunker.chunk_text(content, max_size=max_words)
+
+        return [
+            {"text": chunk, "hash": hashlib.sha256(chunk.encode()).hexdigest()}
+            for chunk in chunks
+        ]
+
+
+    def _iter_chunk_content(self, pages, token_count: int, word_count: int) -> Iterator[dict]:
+        # Versión incremental de _chunk_content para documentos que llegan por
+        # páginas: respeta CHUNKING_MODE y produce los mismos {"text", "hash"}.
+        max_words = self._word_budget(token_count, word_count)
+        if self.chunking_mode == "cdc":
+            yield from self.text_chunker.iter_content_defined(pages, max_words)
+            return
+
+        if self.chunking_mode == "tokens":
+            chunks = self.text_chunker.iter_token_chunks_from_pages(pages, self.max_chunk_size, self.default_model)
+        else:
+            chunks = self.text_chunker.iter_chunks_from_pages(pages, max_words)
+
+        for chunk in chunks:
+            yield {"text": chunk, "hash": hashlib.sha256(chunk.encode()).hexdigest()}
+
+
+    def _word_budget(self, token_count: int, word_count: int) -> int:
+        # MAX_CHUNK_SIZE está en tokens. Los modos que miden en palabras (words,
+        # cdc) lo convierten con la proporción tokens/palabra del propio
+        # documento (en español ronda 1.5-2), así no exceden el presupuesto.
+        if not token_count or not word_count:
+            return self.max_chunk_size
+        return max(1, self.max_chunk_size * word_count // max(token_count, word_count))
+
+
+    def _chunk_summary_key(self, namespace: str, chunk: dict, model: Optional[str] = None) -> str:
+        # El resumen depende del texto, del modelo y de la plantilla del prompt;
+        # la posición del fragmento ya no entra en el prompt.
+        return f"{namespace}:v{CHUNK_PROMPT_VERSION}:{model or self.default_model}:{chunk['hash']}"
+
+
+    async def _summarize_chunks(self, chunks: list[dict], build_prompt, namespace: str,
+                                model: Optional[str] = None) -> list[str]:
+        # Solo los fragmentos sin resumen cacheado pasan por el modelo.
+        summaries = [None] * len(chunks)
+        pending = []
+
+        for i, chunk in enumerate(chunks):
+            cached = self.cache.get_cached_chunk_summary(self._chunk_summary_key(namespace, chunk, model))
+            if cached:
+                summaries[i] = cached
+            else:
+                pending.append(i)
+
+        if len(pending) < len(chunks):
+            print(f"{len(chunks) - len(pending)} de {len(chunks)} partes reutilizadas del caché.")
+
+        results = await self._map_chunks([
+            build_prompt(chunks[i]["text"])
+            for i in pending
+        ], model=model)
+
+        for i, summary in zip(pending, results):
+            summaries[i] = summary
+            self.cache.cache_chunk_summary(
+                self._chunk_summary_key(namespace, chunks[i], model), summary, ttl=self.chunk_summary_ttl
+            )
+
+        return summaries
+
+
+    async def _run_stages(self, stages: dict) -> dict:
+        # Ejecuta un grafo pequeño de etapas {nombre: (dependencias, fn)}. Cada
+        # etapa arranca apenas terminan sus dependencias y recibe sus resultados,
+        # así el tiempo total es el de la ruta más larga y no la suma.
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run(name: str):
+            dependencies, stage_fn = stages[name]
+            results = {dep: await tasks[dep] for dep in dependencies}
+            return await stage_fn(results)
+
+        for name in stages:
+            tasks[name] = asyncio.create_task(run(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {name: task.result() for name, task in tasks.items()}
+
+
+    async def _summarize_chunk_stream(self, chunks, build_prompt, namespace: str,
+                                      model: Optional[str] = None) -> list[str]:
+        # El generador de fragmentos (extracción y chunking, CPU) corre en su
+        # propio hilo y entrega por una cola acotada: no ocupa el pool CPU
+        # compartido y nunca va más de `map_concurrency` fragmentos por delante.
+        # El semáforo limita a la vez las llamadas en vuelo y los fragmentos
+        # retenidos en memoria.
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.map_concurrency)
+        stop = threading.Event()
+        done = object()
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+        tasks = []
+        errors = []
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def produce():
+            try:
+                for chunk in chunks:
+                    if stop.is_set():
+                        return
+                    put(chunk)
+                item = done
+            except Exception as e:
+                item = e
+            finally:
+                # Cierra el generador (y el PDF abierto) en el mismo hilo que lo recorre.
+                close = getattr(chunks, "close", None)
+                if close:
+                    close()
+            if not stop.is_set():
+                put(item)
+
+        async def summarize(chunk: dict, index: int) -> str:
+            try:
+                chunk_key = self._chunk_summary_key(namespace, chunk, model)
+                cached = self.cache.get_cached_chunk_summary(chunk_key)
+                if cached:
+                    return cached
+
+                summary = await self._run_chunk_with_retry(build_prompt(chunk["text"]), index, None, model=model)
+                self.cache.cache_chunk_summary(chunk_key, summary, ttl=self.chunk_summary_ttl)
+                return summary
+            except Exception as e:
+                errors.append(e)
+                raise
+            finally:
+                semaphore.release()
+
+        producer = asyncio.create_task(asyncio.to_thread(produce))
+        try:
+            while True:
+                await semaphore.acquire()
+                if errors:
+                    # Un fragmento agotó sus reintentos: no se extrae el resto.
+                    semaphore.release()
+                    raise errors[0]
+                item = await queue.get()
+                if item is done or isinstance(item, Exception):
+                    semaphore.release()
+                    if item is done:
+                        break
+                    raise item
+                tasks.append(asyncio.create_task(summarize(item, len(tasks))))
+
+            return await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            # Si salimos antes de agotar el generador, el productor ve `stop`
+            # en su próximo fragmento; vaciar la cola destraba un put pendiente.
+            stop.set()
+            while not queue.empty():
+                queue.get_nowait()
+            await producer
+
+
+    async def _map_chunks(self, prompts: list[dict], model: Optional[str] = None) -> list[str]:
+        # Fase map concurrente: como máximo `map_concurrency` llamadas en vuelo,
+        # el resultado conserva el orden original de los fragmentos.
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+
+        async def summarize(index: int, prompt: dict) -> str:
+            async with semaphore:
+                return await self._run_chunk_with_retry(prompt, index, len(prompts), model=model)
+
+        tasks = [asyncio.create_task(summarize(i, prompt)) for i, prompt in enumerate(prompts)]
+        try:
+            return await asyncio.gather(*tasks)
+        except Exception:
+            # Si un fragmento agota sus reintentos, no tiene sentido seguir
+            # pagando por el resto: se cancelan las tareas pendientes.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+
+    async def _reduce_summaries(self, summaries: list[str], title: str, partial_prompt_fn,
+                                model: Optional[str] = None) -> list[str]:
+        # Reducción jerárquica: mientras los resúmenes no quepan en un solo
+        # prompt de combinación, se agrupan por presupuesto de tokens y cada
+        # grupo se condensa en paralelo. La profundidad crece como log(N).
+        if self.reduce_strategy != "tree":
+            return summaries
+
+        level = 0
+        while len(summaries) > 1:
+            groups = self._group_by_token_budget(summaries)
+            if len(groups) == 1:
+                break
+
+            level += 1
+            print(f"Reducción nivel {level}: {len(summaries)} resúmenes en {len(groups)} grupos.")
+            summaries = await self._map_chunks([
+                partial_prompt_fn(group, title, i, len(groups))
+                for i, group in enumerate(groups)
+            ], model=model)
+
+        return summaries
+
+
+    def _group_by_token_budget(self, summaries: list[str]) -> list[list[str]]:
+        groups = []
+        current_group = []
+        current_tokens = 0
+
+        for summary in summaries:
+            summary_tokens = count_tokens(summary, self.default_model)
+
+            # Cada grupo lleva al menos dos resúmenes para garantizar que
+            # cada nivel reduzca la cantidad, aunque alguno exceda el presupuesto.
+            if len(current_group) >= 2 and current_tokens + summary_tokens > self.reduce_token_budget:
+                groups.append(current_group)
+                current_group = []
+                current_tokens = 0
+
+            current_group.append(summary)
+            current_tokens += summary_tokens
+
+        if current_group:
+            # Un resumen suelto al final se une al grupo anterior.
+            if len(current_group) == 1 and groups:
+                groups[-1].extend(current_group)
+            else:
+                groups.append(current_group)
+
+        return groups
+
+
+    async def _run_chunk_with_retry(self, prompt: dict, index: int, total: int | None,
+                                    model: Optional[str] = None) -> str:
+        for attempt in range(self.chunk_max_retries + 1):
+            try:
+                return await self._run_model(prompt, model=model)
+            except Exception as e:
+                if attempt == self.chunk_max_retries:
+                    raise RuntimeError(f"No se pudo resumir la parte {index + 1} de {total or '?'}: {e}") from e
+
+                delay = self.chunk_retry_backoff * (2 ** attempt)
+                print(f"Fallo en la parte {index + 1}/{total or '?'} (intento {attempt + 1}), reintentando en {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+
+    async def _run_model(self, prompt: dict, response_format: str = "text", model: Optional[str] = None,
+                         cacheable: bool = True) -> dict | str:
         model = model or self.default_model
-        
+
+        if not cacheable:
+            # Salidas que deben variar entre llamadas (p. ej. regenerar un quiz).
+            return await self._call_provider(prompt, response_format, model)
+
+        cache_key = self.response_cache.build_key(
+            model, prompt, {"response_format": response_format, "temperature": 0.3, "max_tokens": 4096}
+        )
+        cached_response = await self.response_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
+
+        response = await self._call_provider(prompt, response_format, model)
+        await self.response_cache.set(cache_key, response)
+        return response
+
+
+    async def _call_provider(self, prompt: dict, response_format: str, model: str) -> dict | str:
         try:
             if "gpt" in model:
                 messages = [
@@ -364,29 +1036,32 @@ class AIService:
                 ]
                 
                 if response_format == "json":
-                    response = self.openai.chat.completions.create(
+                    response = await self.openai.chat.completions.create(
                         model=model,
                         messages=messages,
                         response_format={"type": "json_object"},
-                        temperature=0.3
+                        temperature=0.3,
+                        timeout=self.llm_timeout
                     )
                 else:
-                    response = self.openai.chat.completions.create(
+                    response = await self.openai.chat.completions.create(
                         model=model,
                         messages=messages,
-                        temperature=0.3
+                        temperature=0.3,
+                        timeout=self.llm_timeout
                     )
                 
                 content = response.choices[0].message.content
                 return json.loads(content) if response_format == "json" else content
 
             elif "claude" in model:
-                response = self.anthropic.messages.create(
+                response = await self.anthropic.messages.create(
                     model=model,
                     max_tokens=4096,
                     system=prompt["system"],
                     messages=[{"role": "user", "content": prompt["user"]}],
-                    temperature=0.3
+                    temperature=0.3,
+                    timeout=self.llm_timeout
                 )
                 
                 content = response.content[0].text
@@ -400,10 +1075,8 @@ class AIService:
             raise
 
 
-    def _save_document(self, session_id: str, doc_type: str, title: str, content_hash: str,
-                        raw_content: str, summary: dict, source_url: str = None, metadata: dict = None) -> Document:
-        db_session = self.db.get_session()
-
+    async def _save_document(self, session_id: str, doc_type: str, title: str, content_hash: str,
+                             raw_content: str, summary: dict, source_url: str = None, metadata: dict = None) -> Document:
         doc = Document(
             session_id=session_id,
             doc_type=doc_type,
@@ -423,9 +1096,16 @@ class AIService:
             }
         )
 
-        db_session.add(doc)
-        db_session.commit()
-        db_session.refresh(doc)
+        try:
+            async with self.db.async_session_scope() as db_session:
+                db_session.add(doc)
+                await db_session.flush()
+        except IntegrityError:
+            # Un análisis coalescido de la misma sesión ya guardó este contenido.
+            existing_doc = await self.sessions.check_duplicate_hash_async(content_hash, session_id)
+            if existing_doc is None:
+                raise
+            return existing_doc
         self.cache.invalidate_session_cache(session_id)
         
         return doc
\ No newline at end of file
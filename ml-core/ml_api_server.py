@@ -1,9 +1,12 @@
 import asyncio
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from pathlib import Path
 import os
-import shutil
+import hashlib
+import tempfile
 
 # Importa las configuraciones y el servicio principal de IA
 from config import settings
@@ -53,30 +56,89 @@ except Exception as e:
     raise RuntimeError("Fallo en la inicialización de dependencias del servicio ML.")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Cierra los pools de conexiones de los clientes LLM.
+    await ai_service.close()
+
+
+MAX_UPLOAD_BYTES = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Margen para los demás campos y los delimitadores del multipart.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Subidas en curso por hash: varias sesiones pueden compartir el mismo archivo.
+_active_uploads: dict[str, int] = {}
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Rechaza por Content-Length antes de recibir el cuerpo; las subidas sin
+    # esa cabecera se cortan en _save_upload_file al superar el límite.
+    if request.method == "POST" and request.url.path == "/analyze/pdf":
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"El archivo excede el tamaño máximo de {settings.MAX_FILE_SIZE_MB}MB"}
+            )
+    return await call_next(request)
+
+
 # --- 3. FUNCIONES AUXILIARES ---
 
-def _save_upload_file(upload_file: UploadFile, session_id: str) -> Path:
-    """Guarda el archivo subido en la carpeta de uploads."""
+async def _save_upload_file(upload_file: UploadFile) -> tuple[Path, str]:
+    """
+    Copia la subida por bloques a la carpeta de uploads, calculando el SHA-256
+    mientras escribe. El archivo queda guardado bajo su hash, así dos sesiones
+    con el mismo nombre de archivo no colisionan.
+    """
     
     # Crea el directorio si no existe (usado en contenedores Docker)
     os.makedirs(settings.UPLOADS_DIR, exist_ok=True)
     
-    # Usa el session_id para crear una ruta de archivo única
-    # Esto es crucial para que el backend pueda encontrar el archivo luego.
-    safe_filename = f"{session_id}_{upload_file.filename}"
-    file_path = settings.UPLOADS_DIR / safe_filename
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=settings.UPLOADS_DIR, suffix=".part")
+    saved = False
     
     try:
-        with open(file_path, "wb") as buffer:
-            # Escribe el contenido del archivo subido en el disco
-            shutil.copyfileobj(upload_file.file, buffer)
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"El archivo excede el tamaño máximo de {settings.MAX_FILE_SIZE_MB}MB"
+                    )
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+        
+        file_hash = digest.hexdigest()
+        file_path = settings.UPLOADS_DIR / f"{file_hash}.pdf"
+        # Si el archivo ya existe, el contenido es idéntico: reemplazarlo es inocuo.
+        os.replace(tmp_path, file_path)
+        saved = True
+    except HTTPException:
+        raise
     except Exception as e:
-        # Limpieza en caso de error de escritura
-        if file_path.exists():
-            os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"Error al guardar el archivo: {e}")
+    finally:
+        # Subida rechazada, fallida o cancelada (el cliente se desconecta): no
+        # queda el archivo parcial en la carpeta de uploads.
+        if not saved and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return file_path, file_hash
+
 
-    return file_path
+def _release_upload_file(file_path: Path, file_hash: str):
+    """Elimina el archivo cuando ninguna solicitud en curso lo está usando."""
+    _active_uploads[file_hash] -= 1
+    if _active_uploads[file_hash] == 0:
+        del _active_uploads[file_hash]
+        if file_path.exists():
+            os.remove(file_path)
 
 
 # --- 4. ENDPOINTS ---
@@ -87,6 +149,18 @@ async def health_check():
     # Opcionalmente, puedes añadir aquí checks de conexión a DB/Cache.
     return BaseResponse(status="success", message="ML Service is running and healthy.")
 
+@app.get("/metrics")
+async def metrics():
+    """Métricas internas del servicio (cachés y pool de etapas CPU)."""
+    return {
+        "llm_cache": ai_service.response_cache.stats(),
+        "extraction_cache": ai_service.pdf_handler.extraction_cache.stats(),
+        "video_info_cache": ai_service.video_info_cache.stats(),
+        "audio_preprocessing": ai_service.video_handler.audio_stats(),
+        "video_io_executor": ai_service.video_handler.io_executor.stats(),
+        "cpu_executor": ai_service.cpu_executor.stats()
+    }
+
 @app.post("/analyze/pdf", response_model=AnalysisResponse)
 async def analyze_pdf(
     session_id: str = Form(...),
@@ -98,18 +172,17 @@ async def analyze_pdf(
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="El archivo debe ser un PDF.")
         
+    file_path, file_hash = await _save_upload_file(file)
+    _active_uploads[file_hash] = _active_uploads.get(file_hash, 0) + 1
+    
     try:
-        file_path = _save_upload_file(file, session_id)
-        
         # Llama a tu lógica principal de IA
         result = await ai_service.analyze_pdf(
             file_path=str(file_path),
             session_id=session_id,
-            filename=file.filename
+            filename=file.filename,
+            file_hash=file_hash
         )
-        
-        # Elimina el archivo local después de procesar
-        os.remove(file_path)
 
         return AnalysisResponse(
             message="PDF analizado y resumido correctamente.",
@@ -124,6 +197,9 @@ async def analyze_pdf(
     except Exception as e:
         print(f"Error en analyze_pdf: {e}")
         raise HTTPException(status_code=500, detail="Error interno al procesar el PDF.")
+    finally:
+        # Elimina el archivo local después de procesar
+        _release_upload_file(file_path, file_hash)
 
 @app.post("/analyze/video", response_model=AnalysisResponse)
 async def analyze_video(request: AnalysisRequest):
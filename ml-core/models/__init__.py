@@ -1,3 +1,5 @@
 from .model_config import ModelConfig
 from .model_registry import ModelRegistry
-from .fallback_logic import FallbackLogic
\ No newline at end of file
+from .fallback_logic import FallbackLogic
+from .model_router import ModelRouter
+from .response_cache import ResponseCache
\ No newline at end of file
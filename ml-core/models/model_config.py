@@ -12,11 +12,25 @@ class ModelConfig:
         "top_p": 1.0
     }
     
-    # Mapeo de modelos a sus características (para uso futuro)
+    # Mapeo de modelos a sus características. Costos en USD por millón de tokens
+    # y velocidades aproximadas (tokens/s), usados por ModelRouter para estimar
+    # costo y latencia de cada estrategia.
     MODEL_MAP: Dict[str, Dict[str, Any]] = {
-        "gpt-4o": {"client": "openai", "context_window": 128000, "cost_priority": 1},
-        "gpt-4o-mini": {"client": "openai", "context_window": 128000, "cost_priority": 2},
-        "claude-3-5-sonnet": {"client": "anthropic", "context_window": 200000, "cost_priority": 1},
+        "gpt-4o": {
+            "client": "openai", "context_window": 128000, "cost_priority": 1,
+            "input_cost_per_1m": 2.50, "output_cost_per_1m": 10.00,
+            "input_tokens_per_second": 4000, "output_tokens_per_second": 80
+        },
+        "gpt-4o-mini": {
+            "client": "openai", "context_window": 128000, "cost_priority": 2,
+            "input_cost_per_1m": 0.15, "output_cost_per_1m": 0.60,
+            "input_tokens_per_second": 6000, "output_tokens_per_second": 110
+        },
+        "claude-3-5-sonnet": {
+            "client": "anthropic", "context_window": 200000, "cost_priority": 1,
+            "input_cost_per_1m": 3.00, "output_cost_per_1m": 15.00,
+            "input_tokens_per_second": 3500, "output_tokens_per_second": 60
+        },
         # Añadiría 'llama3-8b' aquí si usas Ollama/local
     }
 
@@ -0,0 +1,171 @@
+import math
+from typing import Any, Dict, List, Tuple
+
+from .model_config import ModelConfig
+from .model_registry import ModelRegistry
+
+
+class ModelRouter:
+    """
+    Decide entre una sola llamada de contexto largo y map-reduce por fragmentos,
+    usando la ventana de contexto y el costo de cada modelo de ModelConfig.MODEL_MAP.
+    
+    Cada candidato se estima en costo (USD) y latencia (s); la política
+    ("latency", "cost" o "balanced") elige el mejor.
+    """
+    
+    # Tokens fijos del prompt (instrucciones + formato JSON) por llamada.
+    PROMPT_OVERHEAD_TOKENS = 800
+    # Tokens de salida esperados: resumen por fragmento y resumen final.
+    CHUNK_SUMMARY_TOKENS = 250
+    FINAL_SUMMARY_TOKENS = 1500
+    # Llamada de metadatos de los PDFs: recibe los primeros 2000 caracteres
+    # (ver get_metadata_extraction_prompt) y corre en paralelo al resumen.
+    METADATA_INPUT_TOKENS = 500
+    METADATA_OUTPUT_TOKENS = 300
+    # Latencia fija por llamada (red + cola del proveedor).
+    BASE_CALL_LATENCY_SECONDS = 1.5
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.registry = ModelRegistry(settings)
+
+    def route(self, token_count: int, with_metadata: bool = True) -> Dict[str, Any]:
+        """
+        Devuelve la estrategia elegida para un documento de `token_count` tokens:
+        {"strategy": "single" | "map_reduce", "model", "estimated_cost", "estimated_latency"}.
+        `with_metadata` suma la llamada de metadatos que acompaña a los PDFs.
+        """
+        candidates = self._candidates(token_count, with_metadata)
+        policy = self.settings.ROUTING_POLICY
+
+        if policy == "cost":
+            return min(candidates, key=lambda c: c["estimated_cost"])
+        if policy == "latency":
+            return min(candidates, key=lambda c: c["estimated_latency"])
+
+        # balanced: costo y latencia normalizados contra el mejor candidato.
+        min_cost = min(c["estimated_cost"] for c in candidates) or 1e-9
+        min_latency = min(c["estimated_latency"] for c in candidates) or 1e-9
+        return min(
+            candidates,
+            key=lambda c: c["estimated_cost"] / min_cost + c["estimated_latency"] / min_latency
+        )
+
+    def _candidates(self, token_count: int, with_metadata: bool = True) -> List[Dict[str, Any]]:
+        default_model = self.settings.DEFAULT_LLM_MODEL
+        candidates = [self._estimate_map_reduce(default_model, token_count, with_metadata)]
+        
+        for model_name in self.settings.ROUTING_MODELS:
+            if not self._is_available(model_name):
+                continue
+            
+            model_info = self._model_info(model_name)
+            required = token_count + self.PROMPT_OVERHEAD_TOKENS + ModelConfig.DEFAULT_PARAMS["max_tokens"]
+            if required <= model_info["context_window"]:
+                candidates.append(self._estimate_single(model_name, token_count, with_metadata))
+        
+        return candidates
+
+    def _estimate_single(self, model_name: str, token_count: int, with_metadata: bool = True) -> Dict[str, Any]:
+        input_tokens = token_count + self.PROMPT_OVERHEAD_TOKENS
+        cost = self._call_cost(model_name, input_tokens, self.FINAL_SUMMARY_TOKENS)
+        latency = self._call_latency(model_name, input_tokens, self.FINAL_SUMMARY_TOKENS)
+
+        if with_metadata:
+            metadata_cost, metadata_latency = self._metadata_call(model_name)
+            cost += metadata_cost
+            latency = max(latency, metadata_latency)
+
+        return {
+            "strategy": "single",
+            "model": model_name,
+            "estimated_cost": cost,
+            "estimated_latency": latency
+        }
+
+    def _estimate_map_reduce(self, model_name: str, token_count: int, with_metadata: bool = True) -> Dict[str, Any]:
+        num_chunks = max(1, math.ceil(token_count / self.settings.MAX_CHUNK_SIZE))
+        chunk_input = min(token_count, self.settings.MAX_CHUNK_SIZE) + self.PROMPT_OVERHEAD_TOKENS
+        waves = math.ceil(num_chunks / self.settings.MAP_CONCURRENCY)
+
+        cost = num_chunks * self._call_cost(model_name, chunk_input, self.CHUNK_SUMMARY_TOKENS)
+        latency = waves * self._call_latency(model_name, chunk_input, self.CHUNK_SUMMARY_TOKENS)
+
+        levels_cost, levels_latency, num_summaries = self._estimate_reduce_levels(model_name, num_chunks)
+        cost += levels_cost
+        latency += levels_latency
+
+        if with_metadata:
+            # Los metadatos se piden en paralelo a la fase map y la reducción.
+            metadata_cost, metadata_latency = self._metadata_call(model_name)
+            cost += metadata_cost
+            latency = max(latency, metadata_latency)
+
+        reduce_input = num_summaries * self.CHUNK_SUMMARY_TOKENS + self.PROMPT_OVERHEAD_TOKENS
+        cost += self._call_cost(model_name, reduce_input, self.FINAL_SUMMARY_TOKENS)
+        latency += self._call_latency(model_name, reduce_input, self.FINAL_SUMMARY_TOKENS)
+        return {
+            "strategy": "map_reduce",
+            "model": model_name,
+            "estimated_cost": cost,
+            "estimated_latency": latency
+        }
+
+    def _estimate_reduce_levels(self, model_name: str, num_summaries: int) -> Tuple[float, float, int]:
+        # Niveles intermedios de la reducción en árbol: como en
+        # AIService._reduce_summaries, mientras los resúmenes no quepan en
+        # REDUCE_TOKEN_BUDGET se condensan por grupos (de al menos dos) en
+        # paralelo. Devuelve costo, latencia y resúmenes que llegan al final.
+        cost = latency = 0.0
+        if self.settings.REDUCE_STRATEGY != "tree":
+            return cost, latency, num_summaries
+
+        budget = self.settings.REDUCE_TOKEN_BUDGET
+        while num_summaries > 1:
+            groups = min(num_summaries // 2, math.ceil(num_summaries * self.CHUNK_SUMMARY_TOKENS / budget))
+            if groups <= 1:
+                break
+
+            group_input = math.ceil(num_summaries / groups) * self.CHUNK_SUMMARY_TOKENS + self.PROMPT_OVERHEAD_TOKENS
+            cost += groups * self._call_cost(model_name, group_input, self.CHUNK_SUMMARY_TOKENS)
+            latency += (
+                math.ceil(groups / self.settings.MAP_CONCURRENCY)
+                * self._call_latency(model_name, group_input, self.CHUNK_SUMMARY_TOKENS)
+            )
+            num_summaries = groups
+
+        return cost, latency, num_summaries
+
+    def _metadata_call(self, model_name: str) -> Tuple[float, float]:
+        input_tokens = self.METADATA_INPUT_TOKENS + self.PROMPT_OVERHEAD_TOKENS
+        return (
+            self._call_cost(model_name, input_tokens, self.METADATA_OUTPUT_TOKENS),
+            self._call_latency(model_name, input_tokens, self.METADATA_OUTPUT_TOKENS)
+        )
+
+    def _call_cost(self, model_name: str, input_tokens: int, output_tokens: int) -> float:
+        info = self._model_info(model_name)
+        return (
+            input_tokens * info["input_cost_per_1m"] + output_tokens * info["output_cost_per_1m"]
+        ) / 1_000_000
+
+    def _call_latency(self, model_name: str, input_tokens: int, output_tokens: int) -> float:
+        info = self._model_info(model_name)
+        return (
+            self.BASE_CALL_LATENCY_SECONDS
+            + input_tokens / info["input_tokens_per_second"]
+            + output_tokens / info["output_tokens_per_second"]
+        )
+
+    def _model_info(self, model_name: str) -> Dict[str, Any]:
+        # Modelos fuera del mapa se estiman como el modelo por defecto del mapa.
+        return ModelConfig.MODEL_MAP.get(model_name, ModelConfig.MODEL_MAP["gpt-4o"])
+
+    def _is_available(self, model_name: str) -> bool:
+        client = self.registry.get_client_for_model(model_name)
+        if client == "openai":
+            return bool(self.settings.OPENAI_API_KEY)
+        if client == "anthropic":
+            return bool(self.settings.ANTHROPIC_API_KEY)
+        return False
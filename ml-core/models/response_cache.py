@@ -0,0 +1,85 @@
+import re
+import json
+import asyncio
+import hashlib
+from functools import partial
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """
+    Caché de respuestas LLM direccionada por contenido: la clave es el hash del
+    modelo, los parámetros de inferencia y el prompt normalizado.
+    
+    Usa un LRU pequeño en proceso delante de Redis (CacheManager), de modo que
+    un prompt repetido no vuelve a llegar al proveedor. El cliente de Redis es
+    síncrono, así que sus llamadas se ejecutan en el executor del event loop.
+    """
+    
+    def __init__(self, cache_manager, max_entries: int = 512, ttl: int = 86400):
+        self.cache_manager = cache_manager
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        # Espacios repetidos o saltos de línea distintos no cambian la respuesta.
+        return re.sub(r"\s+", " ", text).strip()
+
+    def build_key(self, model: str, prompt: dict, params: Dict[str, Any]) -> str:
+        """Calcula la clave del caché a partir del modelo, parámetros y prompt."""
+        payload = json.dumps({
+            "model": model,
+            "params": params,
+            "system": self._normalize(prompt.get("system", "")),
+            "user": self._normalize(prompt.get("user", ""))
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Devuelve una copia de la respuesta cacheada o None si no existe."""
+        serialized = self._entries.get(key)
+        if serialized is not None:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return json.loads(serialized)
+        
+        loop = asyncio.get_running_loop()
+        serialized = await loop.run_in_executor(None, self.cache_manager.get_cached_llm_response, key)
+        if serialized is not None:
+            self._remember(key, serialized)
+            self.redis_hits += 1
+            return json.loads(serialized)
+        
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, response: Any) -> None:
+        """Guarda la respuesta serializada en memoria y en Redis."""
+        serialized = json.dumps(response, ensure_ascii=False)
+        self._remember(key, serialized)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(self.cache_manager.cache_llm_response, key, serialized, ttl=self.ttl))
+
+    def _remember(self, key: str, serialized: str) -> None:
+        self._entries[key] = serialized
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos para monitoreo."""
+        lookups = self.memory_hits + self.redis_hits + self.misses
+        hits = self.memory_hits + self.redis_hits
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
@@ -1,5 +1,8 @@
 from processing.pdf_processor import PDFProcessor
 from processing.video_processor import VideoProcessor
 from processing.text_chunker import TextChunker
+from processing.cpu_executor import BoundedExecutor
+from processing.extraction_cache import ExtractionCache
+from processing.video_info_cache import VideoInfoCache
 
-__all__ = ["PDFProcessor", "VideoProcessor", "TextChunker"]
\ No newline at end of file
+__all__ = ["PDFProcessor", "VideoProcessor", "TextChunker", "BoundedExecutor", "ExtractionCache", "VideoInfoCache"]
\ No newline at end of file
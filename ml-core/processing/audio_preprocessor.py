@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+
+from processing.ffmpeg_utils import run_command, probe_duration
+
+
+# atempo de ffmpeg acepta factores entre 0.5 y 2.0 por filtro.
+MIN_SPEED = 0.5
+MAX_SPEED = 2.0
+
+
+def build_filters(trim_silence: bool, silence_db: float, min_silence_seconds: float,
+                  keep_silence_seconds: float, speed: float) -> list[str]:
+    filters = []
+    if trim_silence:
+        # Recorta los silencios largos en todo el audio dejando una pausa
+        # corta, que sigue sirviendo como punto de corte para segmentar.
+        filters.append(
+            f"silenceremove=stop_periods=-1:stop_duration={min_silence_seconds}"
+            f":stop_threshold={silence_db}dB:stop_silence={keep_silence_seconds}"
+        )
+    if speed != 1.0:
+        filters.append(f"atempo={min(MAX_SPEED, max(MIN_SPEED, speed))}")
+    return filters
+
+
+async def preprocess_audio(source_path: str, output_dir: str, bitrate_kbps: int = 24, sample_rate: int = 16000,
+                           trim_silence: bool = True, silence_db: float = -40, min_silence_seconds: float = 1.0,
+                           keep_silence_seconds: float = 0.6, speed: float = 1.0) -> dict:
+    """
+    Convierte el audio a lo que necesita el reconocimiento de voz: mono,
+    16 kHz y Opus de bajo bitrate, sin silencios largos y opcionalmente
+    acelerado. Devuelve la ruta resultante y los bytes/segundos ahorrados.
+    """
+    output_path = str(Path(output_dir) / f"{Path(source_path).stem}_speech.ogg")
+    filters = build_filters(trim_silence, silence_db, min_silence_seconds, keep_silence_seconds, speed)
+
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", source_path, "-vn"]
+    if filters:
+        command += ["-af", ",".join(filters)]
+    command += [
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-c:a", "libopus",
+        "-b:a", f"{bitrate_kbps}k",
+        "-application", "voip",
+        output_path
+    ]
+
+    code, _, stderr = await run_command(*command)
+    if code != 0:
+        raise ValueError(f"Error al preprocesar el audio: {stderr.strip()}")
+
+    original_seconds = await probe_duration(source_path)
+    processed_seconds = await probe_duration(output_path)
+    original_bytes = os.path.getsize(source_path)
+    processed_bytes = os.path.getsize(output_path)
+
+    return {
+        "path": output_path,
+        "original_bytes": original_bytes,
+        "processed_bytes": processed_bytes,
+        "bytes_saved": original_bytes - processed_bytes,
+        "original_seconds": round(original_seconds, 2),
+        "processed_seconds": round(processed_seconds, 2),
+        "seconds_saved": round(original_seconds - processed_seconds, 2)
+    }
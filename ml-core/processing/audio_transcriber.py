@@ -0,0 +1,185 @@
+import re
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from openai import AsyncOpenAI
+
+from processing.ffmpeg_utils import run_command, probe_duration
+
+
+SILENCE_START = re.compile(r'silence_start:\s*(-?[\d.]+)')
+SILENCE_END = re.compile(r'silence_end:\s*([\d.]+)')
+
+
+async def detect_silences(audio_path: str, noise_db: float, min_seconds: float) -> List[Tuple[float, float]]:
+    """Intervalos (inicio, fin) de silencio detectados por el filtro silencedetect de ffmpeg."""
+    code, _, stderr = await run_command(
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", audio_path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_seconds}",
+        "-f", "null", "-"
+    )
+    if code != 0:
+        print(f"No se pudieron detectar silencios: {stderr.strip()[-200:]}")
+        return []
+
+    silences = []
+    start = None
+    for line in stderr.splitlines():
+        if match := SILENCE_START.search(line):
+            start = max(0.0, float(match.group(1)))
+        elif (match := SILENCE_END.search(line)) and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def plan_segments(duration: float, silences: List[Tuple[float, float]], target_seconds: float,
+                  overlap_seconds: float, search_seconds: float) -> List[dict]:
+    """
+    Divide el audio en segmentos de ~target_seconds cortando en el silencio más
+    cercano al punto ideal (dentro de ±search_seconds). Cada segmento "posee"
+    [start, end) y se recorta con `overlap_seconds` extra a cada lado para no
+    perder palabras en los cortes.
+    """
+    midpoints = [(start + end) / 2 for start, end in silences]
+    cuts = []
+    position = 0.0
+
+    while duration - position > target_seconds + search_seconds:
+        ideal = position + target_seconds
+        candidates = [m for m in midpoints if abs(m - ideal) <= search_seconds and m > position]
+        cut = min(candidates, key=lambda m: abs(m - ideal)) if candidates else ideal
+        cuts.append(cut)
+        position = cut
+
+    bounds = [0.0] + cuts + [duration]
+    return [
+        {
+            "index": i,
+            "start": start,
+            "end": end,
+            "clip_start": max(0.0, start - overlap_seconds),
+            "clip_end": min(duration, end + overlap_seconds)
+        }
+        for i, (start, end) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
+def _field(item, name: str):
+    # Los segmentos llegan como dict o como objeto según el cliente/servidor.
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+def stitch_segments(plan: List[dict], results: List[dict]) -> str:
+    """
+    Une las transcripciones por marca de tiempo: de cada segmento se conservan
+    solo las frases cuyo punto medio cae en el intervalo que le pertenece, así
+    el texto de las zonas solapadas no se duplica.
+    """
+    parts = []
+    last = len(plan) - 1
+
+    for segment, result in zip(plan, results):
+        timed = result.get("segments")
+        if not timed:
+            # Sin marcas de tiempo (p. ej. un servidor que solo devuelve texto).
+            parts.append(result.get("text", "").strip())
+            continue
+
+        for item in timed:
+            midpoint = segment["clip_start"] + (_field(item, "start") + _field(item, "end")) / 2
+            if segment["start"] <= midpoint < segment["end"] or (segment["index"] == last and midpoint >= segment["end"]):
+                parts.append((_field(item, "text") or "").strip())
+
+    return " ".join(part for part in parts if part)
+
+
+class SegmentedTranscriber:
+    """
+    Transcribe audio largo en segmentos paralelos: corta en silencios con
+    ffmpeg, envía los segmentos a la API de transcripción con concurrencia
+    acotada y une el resultado por marca de tiempo.
+
+    `base_url` permite apuntar a cualquier servidor compatible con la API de
+    OpenAI (por ejemplo, un stub local para pruebas).
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, model: str = "whisper-1",
+                 concurrency: int = 4, segment_seconds: float = 600, overlap_seconds: float = 2,
+                 search_seconds: float = 30, silence_noise_db: float = -35, silence_min_seconds: float = 0.5,
+                 language: str = "es"):
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url or None)
+        self.model = model
+        self.concurrency = concurrency
+        self.segment_seconds = segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self.search_seconds = search_seconds
+        self.silence_noise_db = silence_noise_db
+        self.silence_min_seconds = silence_min_seconds
+        self.language = language
+
+    async def close(self):
+        await self.client.close()
+
+    async def transcribe(self, audio_path: str) -> str:
+        duration = await probe_duration(audio_path)
+        if duration <= self.segment_seconds + self.search_seconds:
+            result = await self._transcribe_file(audio_path)
+            return result.get("text", "").strip()
+
+        silences = await detect_silences(audio_path, self.silence_noise_db, self.silence_min_seconds)
+        plan = plan_segments(duration, silences, self.segment_seconds, self.overlap_seconds, self.search_seconds)
+        print(f"Audio de {duration / 60:.1f} min dividido en {len(plan)} segmentos.")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        with tempfile.TemporaryDirectory(prefix="segments_") as work_dir:
+            async def transcribe_segment(segment: dict) -> dict:
+                async with semaphore:
+                    segment_path = await self._cut_segment(audio_path, segment, Path(work_dir))
+                    try:
+                        return await self._transcribe_file(str(segment_path))
+                    finally:
+                        segment_path.unlink(missing_ok=True)
+
+            tasks = [asyncio.create_task(transcribe_segment(segment)) for segment in plan]
+            try:
+                results = await asyncio.gather(*tasks)
+            except Exception:
+                # Un segmento fallido invalida la transcripción: se cancela el resto.
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+        return stitch_segments(plan, results)
+
+    async def _cut_segment(self, audio_path: str, segment: dict, work_dir: Path) -> Path:
+        segment_path = work_dir / f"segment_{segment['index']:04d}{Path(audio_path).suffix}"
+        code, _, stderr = await run_command(
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-ss", f"{segment['clip_start']:.3f}",
+            "-t", f"{segment['clip_end'] - segment['clip_start']:.3f}",
+            "-i", audio_path,
+            "-c", "copy",
+            str(segment_path)
+        )
+        if code != 0:
+            raise ValueError(f"Error al cortar el segmento {segment['index']}: {stderr.strip()}")
+        return segment_path
+
+    async def _transcribe_file(self, audio_path: str) -> dict:
+        with open(audio_path, "rb") as audio_file:
+            transcript = await self.client.audio.transcriptions.create(
+                model=self.model,
+                file=audio_file,
+                language=self.language,
+                response_format="verbose_json"
+            )
+        return {
+            "text": transcript.text,
+            "segments": getattr(transcript, "segments", None)
+        }
@@ -0,0 +1,80 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class BoundedExecutor:
+    """
+    Ejecuta etapas CPU-bound (extracción, limpieza, hashing, conteo de tokens)
+    fuera del event loop, en un pool dedicado con cola acotada.
+    
+    Cuando la cola está llena, los nuevos trabajos esperan turno (backpressure)
+    en lugar de acumularse sin límite. Expone profundidad de cola y tiempos de espera.
+    """
+    
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, thread_name_prefix: str = "cpu-stage"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Ejecuta `fn(*args, **kwargs)` en el pool y espera su resultado."""
+        async with self._slots:
+            submitted_at = time.perf_counter()
+            with self._lock:
+                self.queued += 1
+            
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, self._run_job, submitted_at, fn, args, kwargs
+            )
+
+    def _run_job(self, submitted_at: float, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        wait = time.perf_counter() - submitted_at
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+        
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidad de cola y tiempos de espera para monitoreo."""
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_seconds": round(self.total_wait_seconds / started, 4) if started else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 4)
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
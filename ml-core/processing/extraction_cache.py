@@ -0,0 +1,165 @@
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+# Cambiar la versión invalida las entradas previas (p. ej. si cambia la limpieza).
+CACHE_FORMAT_VERSION = 1
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class _CacheWriter:
+    # Escribe las páginas en un archivo temporal y lo publica con un rename
+    # atómico: un lector nunca ve una entrada a medio escribir.
+    def __init__(self, cache: "ExtractionCache", file_hash: str):
+        self.cache = cache
+        self.file_hash = file_hash
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache.cache_dir, suffix=".tmp")
+        # gzip no cierra el archivo que recibe abierto: se cierran los dos.
+        self._raw = os.fdopen(fd, "wb")
+        self._file = gzip.open(self._raw, "wt", encoding="utf-8")
+        self._done = False
+
+    def write(self, text: str, backend: str):
+        self._file.write(json.dumps({"text": text, "backend": backend}, ensure_ascii=False) + "\n")
+
+    def commit(self):
+        if self._done:
+            return
+        self._done = True
+        self._close()
+        os.replace(self._tmp_path, self.cache._path(self.file_hash))
+        self.cache._stored()
+
+    def _close(self):
+        try:
+            self._file.close()
+        finally:
+            self._raw.close()
+
+    def abort(self):
+        if self._done:
+            return
+        self._done = True
+        self._close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class ExtractionCache:
+    """
+    Caché persistente en disco del texto extraído de PDFs, direccionado por el
+    SHA-256 de los bytes del archivo.
+
+    Cada entrada guarda las páginas ya limpias (texto y backend usado), de modo
+    que una re-subida del mismo archivo no vuelve a parsearse. Al superar
+    `max_bytes` se eliminan las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def hash_file(file_path) -> str:
+        """SHA-256 de los bytes crudos del archivo, leído por bloques."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _path(self, file_hash: str) -> Path:
+        return self.cache_dir / f"v{CACHE_FORMAT_VERSION}-{file_hash}.jsonl.gz"
+
+    def lookup(self, file_hash: str) -> Optional[Iterator[Tuple[str, str]]]:
+        """Devuelve un iterador de (texto, backend) por página o None si no existe."""
+        path = self._path(file_hash)
+        try:
+            file = gzip.open(path, "rt", encoding="utf-8")
+            # El mtime marca el último uso para la expulsión LRU.
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return self._read(file)
+
+    @staticmethod
+    def _read(file) -> Iterator[Tuple[str, str]]:
+        with file:
+            for line in file:
+                record = json.loads(line)
+                yield record["text"], record["backend"]
+
+    def writer(self, file_hash: str) -> _CacheWriter:
+        """Escritor incremental, para extracciones que producen páginas al vuelo."""
+        return _CacheWriter(self, file_hash)
+
+    def store(self, file_hash: str, pages: Iterable[Tuple[str, str]]) -> bool:
+        writer = None
+        try:
+            writer = self.writer(file_hash)
+            for text, backend in pages:
+                writer.write(text, backend)
+            writer.commit()
+            return True
+        except Exception as e:
+            print(f"Error al guardar extracción en caché: {e}")
+            if writer:
+                writer.abort()
+            return False
+
+    def _stored(self):
+        with self._lock:
+            self.stores += 1
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self.cache_dir.glob("*.jsonl.gz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Aciertos, fallos y expulsiones para monitoreo."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
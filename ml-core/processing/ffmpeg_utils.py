@@ -0,0 +1,26 @@
+import asyncio
+from typing import Tuple
+
+
+async def run_command(*args: str) -> Tuple[int, str, str]:
+    """Ejecuta un comando (ffmpeg, ffprobe) sin bloquear el event loop: (código, stdout, stderr)."""
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+async def probe_duration(audio_path: str) -> float:
+    """Duración del audio en segundos, según ffprobe."""
+    code, stdout, stderr = await run_command(
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        audio_path
+    )
+    if code != 0:
+        raise ValueError(f"Error al leer la duración del audio: {stderr.strip()}")
+    return float(stdout.strip())
@@ -1,14 +1,289 @@
 import PyPDF2
 import pdfplumber
 import re
+import threading
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import hashlib
+from config import settings
+from processing.text_chunker import get_encoding
+from processing.extraction_cache import ExtractionCache
+
+
+CID_GLYPH = re.compile(r'\(cid:\d+\)')
+GARBLED_RATIO = 0.3
+
+
+def _is_unusable(text: str) -> bool:
+    # Página vacía o "garbled": glifos sin mapeo Unicode (cid:NN), caracteres
+    # de reemplazo o de control en una proporción alta del texto.
+    stripped = text.strip()
+    if not stripped:
+        return True
+    
+    bad_chars = sum(len(match.group()) for match in CID_GLYPH.finditer(stripped))
+    bad_chars += sum(
+        1 for ch in stripped
+        if ch == '\ufffd' or (not ch.isprintable() and not ch.isspace())
+    )
+    return bad_chars / len(stripped) > GARBLED_RATIO
+
+
+PAGE_NUMBER_LINE = re.compile(r'^(?:p[aá]g(?:ina)?\.?|page)?\s*[-–—(\[]?\s*\d+\s*(?:(?:de|of|/)\s*\d+)?\s*[-–—)\]]?$', re.IGNORECASE)
+BULLET_LINE = re.compile(r'^(?:[•▪◦●■\-–*]|\d+[.)])\s')
+# Elemento numerado: "Tema 3", "Propiedad 4.", "Ejemplo 2: ...", "Capítulo IV".
+NUMBERED_ITEM = re.compile(r'^[A-ZÁÉÍÓÚÑ][^\W\d_]*\s+(?:\d+(?:\.\d+)*|[IVXLC]+)(?:[.:)](?!\d)|$)')
+DIGITS = re.compile(r'\d+')
+# Líneas consideradas cabecera/pie: las primeras y últimas no vacías de cada página.
+EDGE_LINES = 2
+BOILERPLATE_MIN_PAGES = 3
+# Una cabecera o pie es corto: las líneas más largas nunca se eliminan.
+BOILERPLATE_MAX_CHARS = 80
+# Páginas recientes que mira el detector incremental (las cabeceras cambian por capítulo).
+BOILERPLATE_WINDOW_PAGES = 12
+
+
+def _is_enumerated(line: str) -> bool:
+    return bool(BULLET_LINE.match(line) or NUMBERED_ITEM.match(line))
+
+
+def _edge_line_indexes(lines: List[str]) -> set:
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    return set(non_empty[:EDGE_LINES] + non_empty[-EDGE_LINES:])
+
+
+class _BoilerplateDetector:
+    # Cuenta en cuántas páginas aparece cada línea de borde corta, con los
+    # números normalizados para que "Manual - 3" y "Manual - 4" sean la misma
+    # línea; el resto del texto debe coincidir exactamente. Es cabecera/pie si
+    # se repite en al menos la mitad de las páginas observadas: todo el
+    # documento o, con `window`, las últimas páginas. Los elementos numerados
+    # ("Tema 3", "1. ...") son contenido aunque abran cada página.
+    def __init__(self, window: Optional[int] = None):
+        self.pages = deque(maxlen=window)
+        self.counts = Counter()
+    
+    @staticmethod
+    def _key(line: str) -> str:
+        return DIGITS.sub("#", " ".join(line.split()))
+    
+    def observe(self, lines: List[str]):
+        if self.pages.maxlen is not None and len(self.pages) == self.pages.maxlen:
+            for key in self.pages[0]:
+                self.counts[key] -= 1
+                if self.counts[key] <= 0:
+                    del self.counts[key]
+        
+        keys = {
+            self._key(lines[i]) for i in _edge_line_indexes(lines)
+            if len(lines[i].strip()) <= BOILERPLATE_MAX_CHARS and not _is_enumerated(lines[i].strip())
+        }
+        self.pages.append(keys)
+        self.counts.update(keys)
+    
+    def is_boilerplate(self, line: str) -> bool:
+        if len(line) > BOILERPLATE_MAX_CHARS or _is_enumerated(line):
+            return False
+        min_pages = max(BOILERPLATE_MIN_PAGES, len(self.pages) // 2)
+        return self.counts[self._key(line)] >= min_pages
+
+
+class _LazyPyPDF2Reader:
+    # Solo abre el archivo con PyPDF2 si alguna página necesita el fallback.
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = None
+        self._reader = None
+    
+    def _get_reader(self) -> PyPDF2.PdfReader:
+        if self._reader is None:
+            self._file = open(self.file_path, 'rb')
+            self._reader = PyPDF2.PdfReader(self._file)
+        return self._reader
+    
+    def page_count(self) -> int:
+        return len(self._get_reader().pages)
+    
+    def extract(self, page_index: int) -> str:
+        try:
+            return self._get_reader().pages[page_index].extract_text() or ""
+        except Exception as e:
+            print(f"Error con PyPDF2 en la página {page_index + 1}: {e}")
+            return ""
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def _extract_page_range(file_path: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[str, str]]:
+    # Versión en lista para el pool de procesos (los generadores no se serializan).
+    return list(_iter_page_range(file_path, start, end))
+
+
+def _iter_page_range(file_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+    # Extrae las páginas [start, end) eligiendo el backend por página: pdfplumber
+    # primero y PyPDF2 solo en las páginas vacías o ilegibles. Produce
+    # (texto, backend) por página.
+    fallback = _LazyPyPDF2Reader(file_path)
+    
+    def fallback_from(first: int) -> Iterator[Tuple[str, str]]:
+        last = fallback.page_count() if end is None else end
+        for i in range(first, last):
+            yield fallback.extract(i), "pypdf2"
+    
+    try:
+        page_numbers = list(range(start + 1, end + 1)) if end is not None else None
+        try:
+            pdf = pdfplumber.open(file_path, pages=page_numbers)
+        except Exception as e:
+            print(f"Error al abrir con pdfplumber, usando PyPDF2: {e}")
+            yield from fallback_from(start)
+            return
+        
+        with pdf:
+            next_index = start
+            try:
+                for page in pdf.pages:
+                    try:
+                        try:
+                            text = page.extract_text() or ""
+                        except Exception as e:
+                            print(f"Error con pdfplumber en la página {page.page_number}: {e}")
+                            text = ""
+                        
+                        # Índice de la siguiente página a producir si falla el recorrido.
+                        next_index = page.page_number
+                        if not _is_unusable(text):
+                            yield text, "pdfplumber"
+                            continue
+                        
+                        fallback_text = fallback.extract(page.page_number - 1)
+                        if not _is_unusable(fallback_text):
+                            yield fallback_text, "pypdf2"
+                        else:
+                            yield text, "pdfplumber"
+                    finally:
+                        # pdfplumber guarda los objetos de cada página; se liberan
+                        # al avanzar, también en las páginas con texto utilizable.
+                        page.flush_cache()
+            except Exception as e:
+                # Un error al recorrer las páginas (p. ej. un árbol de páginas
+                # dañado) no descarta el rango: el resto se lee con PyPDF2.
+                print(f"Error al recorrer páginas con pdfplumber desde la página {next_index + 1}, usando PyPDF2: {e}")
+                yield from fallback_from(next_index)
+    finally:
+        fallback.close()
 
 
 class PDFProcessor:
     def __init__(self):
-        self.max_file_size_mb = 50
+        self.max_file_size_mb = settings.MAX_FILE_SIZE_MB
+        self.extraction_workers = settings.PDF_EXTRACTION_WORKERS
+        self.parallel_min_pages = settings.PDF_PARALLEL_MIN_PAGES
+        self.pages_per_task = settings.PDF_PAGES_PER_TASK
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.extraction_cache = ExtractionCache(
+            settings.EXTRACTION_CACHE_DIR,
+            max_bytes=int(settings.EXTRACTION_CACHE_MAX_MB * 1024 * 1024)
+        )
     
     def extract_text(self, file_path: str) -> str:
+        return self.extract_document(file_path)["text"]
+    
+    def extract_document(self, file_path: str, file_hash: Optional[str] = None) -> dict:
+        # `file_hash` permite reutilizar el SHA-256 calculado al recibir la subida.
+        file_path = self._validate_file(file_path)
+        file_hash = file_hash or self.extraction_cache.hash_file(file_path)
+        
+        cached_pages = self.extraction_cache.lookup(file_hash)
+        if cached_pages is not None:
+            print("Texto extraído recuperado de caché.")
+            pages = list(cached_pages)
+        else:
+            raw_pages = self._extract_pages(file_path)
+            page_backends = [backend for _, backend in raw_pages]
+            
+            fallback_pages = page_backends.count("pypdf2")
+            if fallback_pages:
+                print(f"{fallback_pages} de {len(raw_pages)} páginas extraídas con PyPDF2.")
+            
+            cleaned = self._clean_pages([page_text for page_text, _ in raw_pages])
+            pages = list(zip(cleaned, page_backends))
+            self.extraction_cache.store(file_hash, pages)
+        
+        return {
+            "text": "\n\n".join(page_text for page_text, _ in pages if page_text),
+            "page_count": len(pages),
+            "page_backends": [backend for _, backend in pages],
+            "file_hash": file_hash,
+            "from_cache": cached_pages is not None
+        }
+    
+    def scan_document(self, file_path: str, file_hash: Optional[str] = None, model_name: str = "gpt-4") -> dict:
+        # Primera pasada de los PDFs grandes: extrae y limpia página a página
+        # (dejando el resultado en el caché de extracción) y mide el documento
+        # sin retener su texto. Hash, tokens y palabras se calculan al vuelo, así
+        # la memoria pico depende del tamaño de página, no del documento.
+        file_path = self._validate_file(file_path)
+        encoding = get_encoding(model_name)
+        digest = hashlib.sha256()
+        stats = {"token_count": 0, "word_count": 0, "page_count": 0, "page_backends": [], "head": ""}
+        stats["file_hash"] = file_hash or self.extraction_cache.hash_file(file_path)
+        
+        for page_text, backend in self._iter_cleaned_pages(file_path, stats["file_hash"]):
+            stats["page_count"] += 1
+            stats["page_backends"].append(backend)
+            if not page_text:
+                continue
+            
+            separator = "\n\n" if stats["word_count"] else ""
+            digest.update((separator + page_text).encode())
+            stats["token_count"] += len(encoding.encode(page_text, disallowed_special=()))
+            stats["word_count"] += len(page_text.split())
+            if len(stats["head"]) < 2000:
+                stats["head"] = (stats["head"] + separator + page_text)[:2000]
+        
+        stats["content_hash"] = digest.hexdigest()
+        return stats
+    
+    def iter_page_texts(self, file_path: str, file_hash: str) -> Iterator[str]:
+        # Páginas limpias no vacías, en orden. Tras scan_document se leen del
+        # caché de extracción en lugar de volver a parsear el PDF.
+        file_path = self._validate_file(file_path)
+        for page_text, _ in self._iter_cleaned_pages(file_path, file_hash):
+            if page_text:
+                yield page_text
+    
+    def _iter_cleaned_pages(self, file_path: Path, file_hash: str) -> Iterator[Tuple[str, str]]:
+        cached_pages = self.extraction_cache.lookup(file_hash)
+        if cached_pages is not None:
+            print("Texto extraído recuperado de caché.")
+            yield from cached_pages
+            return
+        
+        # Sin ver el documento completo, una cabecera se detecta cuando se
+        # repite en la mitad de las páginas recientes (al menos tres); las
+        # primeras páginas pueden conservarla.
+        detector = _BoilerplateDetector(window=BOILERPLATE_WINDOW_PAGES)
+        # La entrada se publica solo si se recorren todas las páginas.
+        writer = self.extraction_cache.writer(file_hash)
+        try:
+            for page_text, backend in self._iter_pages(file_path):
+                lines = page_text.splitlines()
+                detector.observe(lines)
+                page_text = self._clean_lines(lines, detector)
+                writer.write(page_text, backend)
+                yield page_text, backend
+            writer.commit()
+        finally:
+            writer.abort()
+    
+    def _validate_file(self, file_path: str) -> Path:
         file_path = Path(file_path)
         
         if not file_path.exists():
@@ -17,47 +292,122 @@ class PDFProcessor:
         if file_path.stat().st_size > self.max_file_size_mb * 1024 * 1024:
             raise ValueError(f"El archivo excede el tamaño máximo de {self.max_file_size_mb}MB")
         
-        try:
-            text = self._extract_with_pdfplumber(file_path)
-            if not text or len(text) < 100:
-                text = self._extract_with_pypdf2(file_path)
-        except Exception as e:
-            print(f"Error con pdfplumber, intentando con PyPDF2: {e}")
-            text = self._extract_with_pypdf2(file_path)
-        
-        text = self._clean_text(text)
-        
-        return text
+        return file_path
     
-    def _extract_with_pdfplumber(self, file_path: Path) -> str:
-        text_parts = []
-        
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(page_text)
-        
-        return "\n\n".join(text_parts)
+    def _extract_pages(self, file_path: Path) -> List[Tuple[str, str]]:
+        return list(self._iter_pages(file_path))
     
-    def _extract_with_pypdf2(self, file_path: Path) -> str:
-        text_parts = []
+    def _iter_pages(self, file_path: Path) -> Iterator[Tuple[str, str]]:
+        page_count = self.get_page_count(str(file_path))
+        if self.extraction_workers <= 1 or page_count < self.parallel_min_pages:
+            yield from _iter_page_range(str(file_path))
+            return
         
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(page_text)
+        # Rangos de páginas pequeños reparten mejor la carga entre procesos. Se
+        # mantienen a lo sumo `extraction_workers` rangos en vuelo y se consumen
+        # en orden, así la memoria no crece con el tamaño del documento.
+        pool = self._get_process_pool()
+        pending = deque()
+        try:
+            for start in range(0, page_count, self.pages_per_task):
+                end = min(start + self.pages_per_task, page_count)
+                pending.append(pool.submit(_extract_page_range, str(file_path), start, end))
+                if len(pending) >= self.extraction_workers:
+                    yield from pending.popleft().result()
+            
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Si el consumidor abandona la extracción, los rangos pendientes no se procesan.
+            for future in pending:
+                future.cancel()
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        # La extracción corre en hilos del executor: sin el lock, dos llamadas
+        # concurrentes podrían crear dos pools y perder uno.
+        with self._pool_lock:
+            if self._process_pool is None:
+                # fork desde un proceso con hilos (event loop, executors, clientes)
+                # puede heredar locks tomados; forkserver/spawn arrancan limpios.
+                start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.extraction_workers,
+                    mp_context=multiprocessing.get_context(start_method)
+                )
+            return self._process_pool
+    
+    def close(self):
+        with self._pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+                self._process_pool = None
+    
+    def _clean_pages(self, pages: List[str]) -> List[str]:
+        # Cabeceras y pies repetidos se detectan sobre todas las páginas y se
+        # eliminan. Devuelve el texto limpio de cada página (puede ser vacío).
+        page_lines = [page.splitlines() for page in pages]
+        detector = _BoilerplateDetector()
+        for lines in page_lines:
+            detector.observe(lines)
         
-        return "\n\n".join(text_parts)
+        return [self._clean_lines(lines, detector) for lines in page_lines]
     
-    def _clean_text(self, text: str) -> str:
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        text = text.strip()
+    def _clean_lines(self, lines: List[str], detector: Optional[_BoilerplateDetector] = None) -> str:
+        # Normalizador de una sola pasada que conserva la estructura: une las
+        # líneas visuales de un mismo párrafo, deshace la separación silábica
+        # ("conoci-\nmiento"), mantiene viñetas en su propia línea y marca
+        # los fines de párrafo con una línea en blanco. Un elemento numerado
+        # o una viñeta nunca absorbe la oración que le sigue.
+        edges = _edge_line_indexes(lines)
+        parts = []
+        previous = ""
+        longest_line = 0
+        in_item = False
+        
+        for i, raw_line in enumerate(lines):
+            line = " ".join(raw_line.split())
+            
+            if not line:
+                if parts and parts[-1] != "\n\n":
+                    parts.append("\n\n")
+                previous = ""
+                in_item = False
+                continue
+            
+            if i in edges and (PAGE_NUMBER_LINE.match(line) or (detector and detector.is_boilerplate(line))):
+                continue
+            
+            longest_line = max(longest_line, len(line))
+            starts_item = _is_enumerated(line)
+            
+            if not previous:
+                parts.append(line)
+            elif previous.endswith("-") and len(previous) > 1 and previous[-2].isalpha() and line[0].islower():
+                parts[-1] = parts[-1][:-1]
+                parts.append(line)
+            elif starts_item:
+                parts.append("\n")
+                parts.append(line)
+            elif previous[-1] in ".!?:" and (in_item or len(previous) < 0.7 * longest_line):
+                # Línea corta que cierra una oración, o un elemento numerado
+                # que termina: fin de párrafo.
+                parts.append("\n\n")
+                parts.append(line)
+                in_item = False
+            elif in_item and NUMBERED_ITEM.fullmatch(previous):
+                # Encabezado numerado sin texto ("Tema 3"): el párrafo empieza después.
+                parts.append("\n\n")
+                parts.append(line)
+                in_item = False
+            else:
+                parts.append(" ")
+                parts.append(line)
+            
+            if starts_item:
+                in_item = True
+            previous = line
         
-        return text
+        return "".join(parts).strip()
     
     def get_page_count(self, file_path: str) -> int:
         try:
@@ -1,89 +1,354 @@
 import re
-from typing import List
+import zlib
+import bisect
+import hashlib
+import tiktoken
+from collections import deque
+from typing import Iterable, Iterator, List, Tuple
 from config import settings
 
 
+WORD = re.compile(r'\S+')
+PARAGRAPH_SEPARATOR = re.compile(r'\n\s*\n')
+SENTENCE_END = re.compile(r'[.!?]+\s+')
+
+# Parámetros del hash rodante para el chunking definido por contenido.
+CDC_WINDOW_WORDS = 16
+CDC_BASE = 1000003
+CDC_MODULUS = (1 << 61) - 1
+
+
+MODEL_ENCODING_MAP = {
+    "gpt-4": "cl100k_base",
+    "gpt-4o": "o200k_base",
+    "gpt-4o-mini": "o200k_base",
+    "gpt-3.5-turbo": "cl100k_base",
+    "claude-3-5-sonnet": "cl100k_base",
+}
+
+
+def get_encoding(model_name: str = "gpt-4") -> tiktoken.Encoding:
+    try:
+        encoding_name = MODEL_ENCODING_MAP.get(model_name, "cl100k_base")
+        return tiktoken.get_encoding(encoding_name)
+    except (KeyError, ValueError):
+        return tiktoken.get_encoding("cl100k_base")
+
+
 class TextChunker:
     def __init__(self):
         self.chunk_overlap = settings.CHUNK_OVERLAP
+        self.chunk_overlap_tokens = settings.CHUNK_OVERLAP_TOKENS
     
     def chunk_text(self, text: str, max_size: int) -> List[str]:
-        paragraphs = self._split_into_paragraphs(text)
+        return list(self.iter_chunks(text, max_size))
+    
+    def iter_chunks(self, text: str, max_size: int) -> Iterator[str]:
+        # Los fragmentos se cortan del texto original solo al consumirlos.
+        for start, end in self.iter_chunk_spans(text, max_size):
+            yield text[start:end]
+    
+    def iter_chunk_spans(self, text: str, max_size: int) -> Iterator[Tuple[int, int]]:
+        # Trabaja sobre spans (inicio, fin) del texto original: el tamaño se mide
+        # en palabras sin partir el texto, y el solapamiento es solo mover el
+        # inicio del span hacia atrás sobre el fragmento anterior.
+        previous = None
+        
+        for start, end in self._iter_base_spans(text, max_size):
+            if previous is None:
+                yield start, end
+            else:
+                yield self._overlap_start(text, previous[0], previous[1]), end
+            previous = (start, end)
+    
+    def iter_chunks_from_pages(self, pages: Iterable[str], max_size: int) -> Iterator[str]:
+        # Chunking incremental: se acumulan páginas hasta tener material para
+        # varios fragmentos, se emiten todos menos el último y este (con su
+        # solapamiento) queda como inicio del buffer para las páginas siguientes.
+        buffer = ""
+        buffered_words = 0
+        
+        for page in pages:
+            buffer = f"{buffer}\n\n{page}" if buffer else page
+            buffered_words += self._count_words(page, 0, len(page))
+            if buffered_words < 2 * max_size:
+                continue
+            
+            spans = list(self.iter_chunk_spans(buffer, max_size))
+            for start, end in spans[:-1]:
+                yield buffer[start:end]
+            
+            buffer = buffer[spans[-1][0]:]
+            buffered_words = self._count_words(buffer, 0, len(buffer))
         
+        if buffer:
+            yield from self.iter_chunks(buffer, max_size)
+    
+    def iter_token_chunks_from_pages(self, pages: Iterable[str], max_tokens: int, model_name: str = "gpt-4") -> Iterator[str]:
+        # Como iter_chunks_from_pages, pero con el presupuesto en tokens reales:
+        # el último fragmento de cada tanda es un sufijo del buffer y arranca
+        # ya con su solapamiento, así que se re-corta junto a las páginas siguientes.
+        encoding = get_encoding(model_name)
+        buffer = ""
+        buffered_tokens = 0
+        
+        for page in pages:
+            buffer = f"{buffer}\n\n{page}" if buffer else page
+            buffered_tokens += len(encoding.encode(page, disallowed_special=()))
+            if buffered_tokens < 2 * max_tokens:
+                continue
+            
+            chunks = self.chunk_by_tokens(buffer, max_tokens, model_name)
+            for chunk in chunks[:-1]:
+                yield chunk["text"]
+            
+            buffer = chunks[-1]["text"]
+            buffered_tokens = chunks[-1]["token_count"]
+        
+        if buffer:
+            for chunk in self.chunk_by_tokens(buffer, max_tokens, model_name):
+                yield chunk["text"]
+    
+    def chunk_by_tokens(self, text: str, max_tokens: int, model_name: str = "gpt-4") -> List[dict]:
+        # Codifica el texto una sola vez y corta sobre offsets de tokens: cada
+        # fragmento (solapamiento incluido) abarca `token_count` tokens de la
+        # codificación del texto completo. Re-codificado por separado puede
+        # diferir en algún token en los bordes, donde BPE une distinto.
+        encoding = get_encoding(model_name)
+        tokens = encoding.encode(text, disallowed_special=())
+        if not tokens:
+            return []
+        
+        _, offsets = encoding.decode_with_offsets(tokens)
+        # Se corta el texto original por offsets de carácter: decodificar un rango
+        # de tokens puede partir un carácter multibyte y producir U+FFFD.
+        char_bounds = offsets + [len(text)]
+        paragraph_cuts = self._boundary_token_indexes(text, offsets, r'\n\s*\n')
+        sentence_cuts = self._boundary_token_indexes(text, offsets, r'[.!?]+(?=\s)')
+        
+        overlap = min(self.chunk_overlap_tokens, max_tokens // 4)
         chunks = []
-        current_chunk = []
-        current_size = 0
+        start = 0
         
-        for para in paragraphs:
-            para_words = para.split()
-            para_size = len(para_words)
+        while start < len(tokens):
+            end = min(start + max_tokens, len(tokens))
+            
+            if end < len(tokens):
+                # Preferimos cortar en un párrafo y luego en una oración, siempre
+                # que el fragmento conserve al menos la mitad del presupuesto.
+                min_end = start + max_tokens // 2
+                end = (
+                    self._last_cut_in_range(paragraph_cuts, min_end, end)
+                    or self._last_cut_in_range(sentence_cuts, min_end, end)
+                    or end
+                )
             
-            if current_size + para_size <= max_size:
-                current_chunk.extend(para_words)
-                current_size += para_size
+            chunks.append({
+                "text": text[char_bounds[start]:char_bounds[end]],
+                "token_count": end - start
+            })
+            
+            if end >= len(tokens):
+                break
+            start = max(end - overlap, start + 1)
+        
+        return chunks
+    
+    def chunk_content_defined(self, text: str, max_size: int) -> List[dict]:
+        return list(self.iter_content_defined([text], max_size))
+    
+    def iter_content_defined(self, pages: Iterable[str], max_size: int) -> Iterator[dict]:
+        # Los límites dependen solo del contenido cercano (hash rodante sobre las
+        # últimas CDC_WINDOW_WORDS palabras normalizadas), así que una edición
+        # local solo cambia los fragmentos vecinos y el resto conserva su hash.
+        # El estado cruza los límites de página: alimentar las páginas una a una
+        # produce los mismos fragmentos que el texto unido con "\n\n".
+        min_size = max(1, max_size // 4)
+        divisor = max(1, max_size // 2)
+        base_power = pow(CDC_BASE, CDC_WINDOW_WORDS, CDC_MODULUS)
+        
+        window = deque()
+        rolling = 0
+        pieces = []
+        chunk_words = 0
+        digest = hashlib.sha256()
+        
+        for page in pages:
+            piece_start = None
+            
+            for word in WORD.finditer(page):
+                normalized = word.group().lower().encode()
+                word_hash = zlib.crc32(normalized)
+                
+                rolling = (rolling * CDC_BASE + word_hash) % CDC_MODULUS
+                window.append(word_hash)
+                if len(window) > CDC_WINDOW_WORDS:
+                    rolling = (rolling - window.popleft() * base_power) % CDC_MODULUS
+                
+                if piece_start is None:
+                    piece_start = word.start()
+                chunk_words += 1
+                digest.update(normalized + b" ")
+                
+                at_boundary = chunk_words >= min_size and rolling % divisor == divisor - 1
+                if at_boundary or chunk_words >= max_size:
+                    pieces.append(page[piece_start:word.end()])
+                    yield {"text": "\n\n".join(pieces), "hash": digest.hexdigest()}
+                    pieces = []
+                    piece_start = None
+                    chunk_words = 0
+                    digest = hashlib.sha256()
+            
+            if piece_start is not None:
+                pieces.append(page[piece_start:].rstrip())
+        
+        if pieces:
+            yield {"text": "\n\n".join(pieces), "hash": digest.hexdigest()}
+    
+    def _boundary_token_indexes(self, text: str, offsets: List[int], pattern: str) -> List[int]:
+        # Índice del primer token que empieza en o después de cada límite.
+        indexes = []
+        for match in re.finditer(pattern, text):
+            index = bisect.bisect_left(offsets, match.end())
+            if not indexes or indexes[-1] != index:
+                indexes.append(index)
+        return indexes
+    
+    def _last_cut_in_range(self, cuts: List[int], low: int, high: int) -> int | None:
+        position = bisect.bisect_right(cuts, high) - 1
+        if position >= 0 and cuts[position] > low:
+            return cuts[position]
+        return None
+    
+    def _iter_base_spans(self, text: str, max_size: int) -> Iterator[Tuple[int, int]]:
+        chunk_start = chunk_end = None
+        chunk_size = 0
+        
+        for para_start, para_end in self._iter_paragraph_spans(text):
+            para_size = self._count_words(text, para_start, para_end)
+            
+            if chunk_size + para_size <= max_size:
+                if chunk_start is None:
+                    chunk_start = para_start
+                chunk_end = para_end
+                chunk_size += para_size
             else:
-                if current_chunk:
-                    chunks.append(" ".join(current_chunk))
+                if chunk_start is not None:
+                    yield chunk_start, chunk_end
                 
                 if para_size > max_size:
-                    sub_chunks = self._split_large_paragraph(para, max_size)
-                    chunks.extend(sub_chunks[:-1])
-                    current_chunk = sub_chunks[-1].split()
-                    current_size = len(current_chunk)
+                    # Todos los grupos de oraciones salvo el último se emiten;
+                    # el último queda abierto para seguir acumulando párrafos.
+                    pending = None
+                    for group in self._iter_sentence_groups(text, para_start, para_end, max_size):
+                        if pending is not None:
+                            yield pending[0], pending[1]
+                        pending = group
+                    chunk_start, chunk_end, chunk_size = pending
                 else:
-                    current_chunk = para_words
-                    current_size = para_size
-        
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+                    chunk_start, chunk_end, chunk_size = para_start, para_end, para_size
         
-        overlapped_chunks = self._add_overlap(chunks)
-        
-        return overlapped_chunks
-    
-    def _split_into_paragraphs(self, text: str) -> List[str]:
-        paragraphs = re.split(r'\n\s*\n', text)
-        paragraphs = [p.strip() for p in paragraphs if p.strip()]
-        return paragraphs
+        if chunk_start is not None:
+            yield chunk_start, chunk_end
     
-    def _split_large_paragraph(self, paragraph: str, max_size: int) -> List[str]:
-        sentences = re.split(r'[.!?]+\s+', paragraph)
+    def _iter_paragraph_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        position = 0
+        for separator in PARAGRAPH_SEPARATOR.finditer(text):
+            span = self._strip_span(text, position, separator.start())
+            if span:
+                yield span
+            position = separator.end()
         
-        chunks = []
-        current_chunk = []
-        current_size = 0
+        span = self._strip_span(text, position, len(text))
+        if span:
+            yield span
+    
+    def _iter_sentence_groups(self, text: str, start: int, end: int, max_size: int) -> Iterator[Tuple[int, int, int]]:
+        group_start = group_end = None
+        group_size = 0
         
-        for sentence in sentences:
-            sentence_words = sentence.split()
-            sentence_size = len(sentence_words)
+        for sentence_start, sentence_end in self._iter_sentence_spans(text, start, end):
+            sentence_size = self._count_words(text, sentence_start, sentence_end)
             
-            if current_size + sentence_size <= max_size:
-                current_chunk.extend(sentence_words)
-                current_size += sentence_size
+            if sentence_size > max_size:
+                # Un tramo sin puntuación más largo que el presupuesto (tablas,
+                # texto OCR) se corta por cantidad de palabras; el último corte
+                # queda abierto para seguir acumulando oraciones.
+                if group_start is not None:
+                    yield group_start, group_end, group_size
+                pending = None
+                for window in self._iter_word_windows(text, sentence_start, sentence_end, max_size):
+                    if pending is not None:
+                        yield pending
+                    pending = window
+                group_start, group_end, group_size = pending
+            elif group_size + sentence_size <= max_size:
+                if group_start is None:
+                    group_start = sentence_start
+                group_end = sentence_end
+                group_size += sentence_size
             else:
-                if current_chunk:
-                    chunks.append(" ".join(current_chunk))
-                current_chunk = sentence_words
-                current_size = sentence_size
+                if group_start is not None:
+                    yield group_start, group_end, group_size
+                group_start, group_end, group_size = sentence_start, sentence_end, sentence_size
         
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        if group_start is not None:
+            yield group_start, group_end, group_size
+    
+    def _iter_word_windows(self, text: str, start: int, end: int, max_size: int) -> Iterator[Tuple[int, int, int]]:
+        window_start = window_end = None
+        window_size = 0
         
-        return chunks
+        for word in WORD.finditer(text, start, end):
+            if window_start is None:
+                window_start = word.start()
+            window_end = word.end()
+            window_size += 1
+            
+            if window_size == max_size:
+                yield window_start, window_end, window_size
+                window_start = None
+                window_size = 0
+        
+        if window_start is not None:
+            yield window_start, window_end, window_size
     
-    def _add_overlap(self, chunks: List[str]) -> List[str]:
-        if len(chunks) <= 1:
-            return chunks
+    def _iter_sentence_spans(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        position = start
+        for sentence_end in SENTENCE_END.finditer(text, start, end):
+            span = self._strip_span(text, position, sentence_end.end())
+            if span:
+                yield span
+            position = sentence_end.end()
         
-        overlapped = [chunks[0]]
+        span = self._strip_span(text, position, end)
+        if span:
+            yield span
+    
+    def _strip_span(self, text: str, start: int, end: int) -> Tuple[int, int] | None:
+        first_word = WORD.search(text, start, end)
+        if not first_word:
+            return None
         
-        for i in range(1, len(chunks)):
-            prev_words = chunks[i-1].split()
-            curr_words = chunks[i].split()
-            
-            overlap_words = prev_words[-self.chunk_overlap:] if len(prev_words) > self.chunk_overlap else prev_words
-            
-            new_chunk = " ".join(overlap_words + curr_words)
-            overlapped.append(new_chunk)
+        while end > first_word.start() and text[end - 1].isspace():
+            end -= 1
+        return first_word.start(), end
+    
+    def _count_words(self, text: str, start: int, end: int) -> int:
+        return sum(1 for _ in WORD.finditer(text, start, end))
+    
+    def _overlap_start(self, text: str, start: int, end: int) -> int:
+        # Retrocede `chunk_overlap` palabras desde el final del span anterior.
+        position = end
+        words = 0
+        
+        while position > start and words < self.chunk_overlap:
+            while position > start and text[position - 1].isspace():
+                position -= 1
+            while position > start and not text[position - 1].isspace():
+                position -= 1
+            words += 1
         
-        return overlapped
\ No newline at end of file
+        while position < end and text[position].isspace():
+            position += 1
+        return position
@@ -0,0 +1,73 @@
+import time
+import asyncio
+from functools import partial
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class VideoInfoCache:
+    """
+    Caché de metadatos de video (título, duración, canal) por ID canónico.
+
+    Un LRU en proceso delante de Redis (CacheManager): la extracción con
+    yt_dlp tarda segundos y el mismo video se analiza desde varias sesiones.
+    Una entrada leída de Redis vence en memoria cuando vence allí. El cliente
+    de Redis es síncrono, así que sus llamadas se ejecutan en el executor.
+    """
+
+    def __init__(self, cache_manager, max_entries: int = 256, ttl: int = 86400):
+        self.cache_manager = cache_manager
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # video_id -> (vencimiento según time.monotonic(), metadatos)
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def get(self, video_id: str) -> Optional[dict]:
+        """Devuelve una copia de los metadatos cacheados o None si no existen."""
+        entry = self._entries.get(video_id)
+        if entry is not None:
+            expires_at, info = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(video_id)
+                self.memory_hits += 1
+                return dict(info)
+            del self._entries[video_id]
+
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self.cache_manager.get_cached_video_info_with_ttl, video_id)
+        if cached is not None:
+            info, remaining = cached
+            # TTL -1: la clave no tiene vencimiento en Redis.
+            self._remember(video_id, info, remaining if remaining > 0 else self.ttl)
+            self.redis_hits += 1
+            return dict(info)
+
+        self.misses += 1
+        return None
+
+    async def set(self, video_id: str, info: dict) -> None:
+        """Guarda los metadatos en memoria y en Redis."""
+        self._remember(video_id, dict(info), self.ttl)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(self.cache_manager.cache_video_info, video_id, info, ttl=self.ttl))
+
+    def _remember(self, video_id: str, info: dict, ttl: float) -> None:
+        self._entries[video_id] = (time.monotonic() + ttl, info)
+        self._entries.move_to_end(video_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos para monitoreo."""
+        lookups = self.memory_hits + self.redis_hits + self.misses
+        hits = self.memory_hits + self.redis_hits
+        return {
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
@@ -1,15 +1,83 @@
 import yt_dlp
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
-from openai import OpenAI
 from config import settings
+from processing.audio_transcriber import SegmentedTranscriber
+from processing.audio_preprocessor import preprocess_audio
+from processing.cpu_executor import BoundedExecutor
 import tempfile
+import shutil
 import os
-import asyncio
+import re
+from urllib.parse import urlparse, parse_qs
+
+YOUTUBE_DOMAINS = ("youtube.com", "youtube-nocookie.com")
+VIDEO_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+
+def extract_video_id(youtube_url: str) -> str | None:
+    """ID de YouTube a partir de las formas habituales de URL (watch, youtu.be, shorts, embed)."""
+    parsed = urlparse(youtube_url.strip())
+    if not parsed.scheme:
+        parsed = urlparse("https://" + youtube_url.strip())
+    host = (parsed.hostname or "").lower()
+    path_parts = [part for part in parsed.path.split("/") if part]
+    
+    candidate = None
+    if host == "youtu.be" and path_parts:
+        candidate = path_parts[0]
+    elif any(host == domain or host.endswith("." + domain) for domain in YOUTUBE_DOMAINS):
+        if parsed.path == "/watch":
+            candidate = parse_qs(parsed.query).get("v", [None])[0]
+        elif len(path_parts) >= 2 and path_parts[0] in ("shorts", "embed", "live", "v"):
+            candidate = path_parts[1]
+    
+    return candidate if candidate and VIDEO_ID.match(candidate) else None
+
+
+def canonical_video_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
 
 class VideoProcessor:
+    # Idiomas de transcripción en orden de preferencia (Whisper transcribe en el primero).
+    preferred_languages = ["es", "en"]
+    
     def __init__(self):
-        self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+        # WHISPER_BASE_URL permite usar un servidor compatible (o un stub local) sin API key.
+        if settings.OPENAI_API_KEY or settings.WHISPER_BASE_URL:
+            self.transcriber = SegmentedTranscriber(
+                api_key=settings.OPENAI_API_KEY or "local",
+                base_url=settings.WHISPER_BASE_URL,
+                model=settings.WHISPER_MODEL,
+                concurrency=settings.WHISPER_CONCURRENCY,
+                segment_seconds=settings.WHISPER_SEGMENT_SECONDS,
+                overlap_seconds=settings.WHISPER_SEGMENT_OVERLAP_SECONDS,
+                search_seconds=settings.WHISPER_SILENCE_SEARCH_SECONDS,
+                silence_noise_db=settings.WHISPER_SILENCE_NOISE_DB,
+                silence_min_seconds=settings.WHISPER_SILENCE_MIN_SECONDS,
+                language=self.preferred_languages[0]
+            )
+        else:
+            self.transcriber = None
+        
+        self.audio_totals = {"videos": 0, "bytes_saved": 0, "seconds_saved": 0.0}
+        
+        # yt_dlp y youtube-transcript-api son bloqueantes: corren en un pool
+        # acotado propio para no frenar el event loop ni al pool de CPU.
+        self.io_executor = BoundedExecutor(
+            max_workers=settings.VIDEO_IO_WORKERS,
+            max_queue=settings.VIDEO_IO_MAX_QUEUE,
+            thread_name_prefix="video-io"
+        )
+    
+    async def close(self):
+        if self.transcriber:
+            await self.transcriber.close()
+        self.io_executor.shutdown()
+    
+    async def fetch_video_info(self, youtube_url: str) -> dict:
+        return await self.io_executor.run(self.get_video_info, youtube_url)
     
     def get_video_info(self, youtube_url: str) -> dict:
         ydl_opts = {
@@ -30,22 +98,33 @@ class VideoProcessor:
         except Exception as e:
             raise ValueError(f"Error al obtener información del video: {str(e)}")
     
-    async def transcribe_video(self, youtube_url: str) -> str:
-        video_info = self.get_video_info(youtube_url)
-        video_id = video_info.get("video_id")
+    async def transcribe_video(self, youtube_url: str, video_info: dict | None = None) -> str:
+        return (await self.transcribe(youtube_url, video_info))["text"]
+    
+    async def transcribe(self, youtube_url: str, video_info: dict | None = None, video_id: str | None = None) -> dict:
+        """Transcribe el video y devuelve {text, language, source}."""
+        # Con el ID (o los metadatos) ya conocidos no hace falta otra extracción con yt_dlp.
+        if not video_id:
+            video_info = video_info or await self.fetch_video_info(youtube_url)
+            video_id = video_info.get("video_id")
         
         if not video_id:
             raise ValueError("No se pudo extraer el ID del video")
         
-        transcript_text = self._try_youtube_transcripts(video_id)
+        transcript = await self.io_executor.run(self._try_youtube_transcripts, video_id)
         
-        if transcript_text:
-            return transcript_text
+        if transcript:
+            return transcript
         
         print("No hay subtítulos disponibles. Intentando transcribir con Whisper...")
-        return await self._transcribe_with_whisper(youtube_url)
+        transcription = await self._transcribe_with_whisper(youtube_url)
+        return {
+            **transcription,
+            "language": self.preferred_languages[0],
+            "source": "whisper"
+        }
     
-    def _try_youtube_transcripts(self, video_id: str) -> str | None:
+    def _try_youtube_transcripts(self, video_id: str) -> dict | None:
         try:
             transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
             
@@ -61,64 +140,91 @@ class VideoProcessor:
             transcript_text = " ".join([entry['text'] for entry in transcript_data])
             
             print(f"Transcripción obtenida de YouTube (idioma: {transcript.language_code})")
-            return transcript_text
+            return {
+                "text": transcript_text,
+                # 'es-ES' y 'es' se guardan bajo el mismo idioma.
+                "language": transcript.language_code.split("-")[0],
+                "source": "youtube"
+            }
             
         except (TranscriptsDisabled, NoTranscriptFound, Exception) as e:
             print(f"No se pudieron obtener subtítulos de YouTube: {str(e)}")
             return None
     
-    async def _transcribe_with_whisper(self, youtube_url: str) -> str:
-        if not self.openai_client:
+    async def _transcribe_with_whisper(self, youtube_url: str) -> dict:
+        if not self.transcriber:
             raise ValueError("API key de OpenAI no configurada para usar Whisper")
         
-        temp_audio = None
+        # Directorio propio por trabajo: transcripciones simultáneas no se pisan.
+        job_dir = tempfile.mkdtemp(prefix="video_job_")
         try:
-            temp_audio = self._download_audio(youtube_url)
+            # Con preprocesamiento se descarga el audio original sin recodificar:
+            # una sola conversión, directa al formato para voz.
+            preprocess = settings.AUDIO_PREPROCESS
+            temp_audio = await self.io_executor.run(self._download_audio, youtube_url, job_dir, not preprocess)
+            
+            audio_report = None
+            if preprocess:
+                audio_report = await preprocess_audio(
+                    temp_audio,
+                    job_dir,
+                    bitrate_kbps=settings.AUDIO_BITRATE_KBPS,
+                    sample_rate=settings.AUDIO_SAMPLE_RATE,
+                    trim_silence=settings.AUDIO_TRIM_SILENCE,
+                    silence_db=settings.AUDIO_SILENCE_DB,
+                    min_silence_seconds=settings.AUDIO_MIN_SILENCE_SECONDS,
+                    keep_silence_seconds=settings.AUDIO_KEEP_SILENCE_SECONDS,
+                    speed=settings.AUDIO_SPEEDUP
+                )
+                temp_audio = audio_report["path"]
+                self._record_audio_savings(audio_report)
             
             print(f"Transcribiendo audio con Whisper...")
-            def sync_transcribe(audio_path):
-                """Función síncrona que contiene la llamada bloqueante."""
-                with open(audio_path, "rb") as audio_file:
-                    return self.openai_client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        language="es"
-                    )
-            transcript = await asyncio.to_thread(
-                sync_transcribe,
-                temp_audio
-        )
-            return transcript.text
+            return {
+                "text": await self.transcriber.transcribe(temp_audio),
+                "audio": audio_report
+            }
             
         except Exception as e:
             raise ValueError(f"Error al transcribir con Whisper: {str(e)}")
         
         finally:
-            if temp_audio and os.path.exists(temp_audio):
-                try:
-                    os.remove(temp_audio)
-                except:
-                    pass
+            shutil.rmtree(job_dir, ignore_errors=True)
+    
+    def _record_audio_savings(self, report: dict):
+        print(
+            f"Audio preprocesado: {report['original_bytes'] / 1e6:.1f} MB -> {report['processed_bytes'] / 1e6:.1f} MB, "
+            f"{report['original_seconds'] / 60:.1f} min -> {report['processed_seconds'] / 60:.1f} min."
+        )
+        self.audio_totals["videos"] += 1
+        self.audio_totals["bytes_saved"] += report["bytes_saved"]
+        self.audio_totals["seconds_saved"] += report["seconds_saved"]
     
-    def _download_audio(self, youtube_url: str) -> str:
-        temp_dir = tempfile.gettempdir()
-        temp_audio = os.path.join(temp_dir, "temp_audio.mp3")
+    def audio_stats(self) -> dict:
+        """Ahorro acumulado del preprocesamiento de audio, para monitoreo."""
+        return {**self.audio_totals, "seconds_saved": round(self.audio_totals["seconds_saved"], 2)}
+    
+    def _download_audio(self, youtube_url: str, output_dir: str, transcode: bool = True) -> str:
+        temp_audio = os.path.join(output_dir, "audio.mp3")
         
         ydl_opts = {
             "format": "bestaudio/best",
-            "postprocessors": [{
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }],
-            "outtmpl": temp_audio.replace(".mp3", ""),
+            "outtmpl": os.path.join(output_dir, "audio.%(ext)s"),
             "quiet": True,
             "no_warnings": True
         }
+        if transcode:
+            ydl_opts["postprocessors"] = [{
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": "192",
+            }]
         
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([youtube_url])
+                info = ydl.extract_info(youtube_url, download=True)
+                if not transcode:
+                    return ydl.prepare_filename(info)
             
             return temp_audio
             
@@ -5,6 +5,7 @@ from .pdf_prompts import (
     get_pdf_summary_prompt,
     get_chunk_summary_prompt,
     get_combine_summaries_prompt,
+    get_partial_combine_summaries_prompt,
     get_metadata_extraction_prompt
 )
 
@@ -12,7 +13,8 @@ from .video_prompts import (
     SYSTEM_PROMPT_VIDEO_SUMMARIZER,
     get_video_summary_prompt,
     get_video_chunk_summary_prompt,
-    get_combine_video_summaries_prompt
+    get_combine_video_summaries_prompt,
+    get_partial_combine_video_summaries_prompt
 )
 
 from .quiz_prompts import (
@@ -27,12 +29,14 @@ __all__ = [
     "get_pdf_summary_prompt",
     "get_chunk_summary_prompt",
     "get_combine_summaries_prompt",
+    "get_partial_combine_summaries_prompt",
     "get_metadata_extraction_prompt",
 
     "SYSTEM_PROMPT_VIDEO_SUMMARIZER",
     "get_video_summary_prompt",
     "get_video_chunk_summary_prompt",
     "get_combine_video_summaries_prompt",
+    "get_partial_combine_video_summaries_prompt",
 
     "SYSTEM_PROMPT_QUIZ_GENERATOR",
     "get_quiz_for_video_prompt",
@@ -58,8 +58,10 @@ def get_pdf_summary_prompt(content: str, doc_title: str = "documento") -> dict:
     }
 
 
-def get_chunk_summary_prompt(chunk: str, chunk_index: int, total_chunks: int) -> dict:
-    user_prompt = f"""Resume el siguiente fragmento de documento (parte {chunk_index + 1} de {total_chunks}):
+def get_chunk_summary_prompt(chunk: str) -> dict:
+    # Sin la posición del fragmento: el mismo texto produce el mismo prompt y
+    # su resumen cacheado sirve en cualquier documento o versión.
+    user_prompt = f"""Resume el siguiente fragmento de documento:
 
 **FRAGMENTO:**
 {chunk}
@@ -124,6 +126,35 @@ Genera el resumen final en 3 niveles (JSON igual que antes):
     }
 
 
+def get_partial_combine_summaries_prompt(chunk_summaries: list[str], doc_title: str, group_index: int, total_groups: int) -> dict:
+    combined_text = "\n\n".join([
+        f"**Parte {i+1}:** {summary}" 
+        for i, summary in enumerate(chunk_summaries)
+    ])
+    
+    user_prompt = f"""Tienes los resúmenes de secciones consecutivas del documento "{doc_title}" (bloque {group_index + 1} de {total_groups}).
+Condénsalos en un único resumen intermedio que luego se combinará con los demás bloques.
+
+**RESÚMENES DE SECCIONES:**
+{combined_text}
+
+---
+
+**TAREA:**
+Genera un resumen integrado (6-10 oraciones) que:
+1. Conserve las ideas principales y conceptos clave de todas las secciones
+2. Mantenga el orden en que aparecen en el documento
+3. Incluya datos o cifras importantes
+
+**FORMATO DE RESPUESTA:**
+Un párrafo claro y coherente, sin bullets ni JSON."""
+
+    return {
+        "system": SYSTEM_PROMPT_SUMMARIZER,
+        "user": user_prompt
+    }
+
+
 def get_metadata_extraction_prompt(content: str) -> dict:
     user_prompt = f"""Analiza el siguiente contenido y extrae metadatos estructurados:
 
@@ -66,8 +66,8 @@ def get_video_summary_prompt(transcript: str, video_title: str, duration: int =
     }
 
 
-def get_video_chunk_summary_prompt(chunk: str, chunk_index: int, total_chunks: int, video_title: str) -> dict:
-    user_prompt = f"""Resume el siguiente segmento del video "{video_title}" (parte {chunk_index + 1} de {total_chunks}):
+def get_video_chunk_summary_prompt(chunk: str, video_title: str) -> dict:
+    user_prompt = f"""Resume el siguiente segmento del video "{video_title}":
 
 **SEGMENTO DE TRANSCRIPCIÓN:**
 {chunk}
@@ -131,6 +131,35 @@ Genera el resumen final con los 3 niveles (formato JSON igual que antes).
 }}
 ```"""
 
+    return {
+        "system": SYSTEM_PROMPT_VIDEO_SUMMARIZER,
+        "user": user_prompt
+    }
+
+
+def get_partial_combine_video_summaries_prompt(chunk_summaries: list[str], video_title: str, group_index: int, total_groups: int) -> dict:
+    combined_text = "\n\n".join([
+        f"**Segmento {i+1}:** {summary}" 
+        for i, summary in enumerate(chunk_summaries)
+    ])
+    
+    user_prompt = f"""Tienes los resúmenes de segmentos consecutivos del video "{video_title}" (bloque {group_index + 1} de {total_groups}).
+Condénsalos en un único resumen intermedio que luego se combinará con los demás bloques.
+
+**RESÚMENES DE SEGMENTOS:**
+{combined_text}
+
+---
+
+**TAREA:**
+Genera un resumen narrativo (6-10 oraciones) que:
+1. Respete el orden temporal de los segmentos
+2. Conserve los puntos clave, ejemplos y demostraciones mencionados
+3. Señale las transiciones entre temas
+
+**FORMATO:**
+Un párrafo narrativo, sin bullets ni JSON."""
+
     return {
         "system": SYSTEM_PROMPT_VIDEO_SUMMARIZER,
         "user": user_prompt
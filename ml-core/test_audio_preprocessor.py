@@ -0,0 +1,51 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import processing.audio_preprocessor as audio_preprocessor
+from processing.audio_preprocessor import build_filters, preprocess_audio
+
+
+class BuildFiltersTest(unittest.TestCase):
+    def test_no_filters_without_trim_or_speed(self):
+        self.assertEqual(build_filters(False, -40, 1.0, 0.6, 1.0), [])
+
+    def test_speed_is_clamped_to_atempo_range(self):
+        self.assertEqual(build_filters(False, -40, 1.0, 0.6, 3.0), ["atempo=2.0"])
+        self.assertEqual(build_filters(False, -40, 1.0, 0.6, 0.2), ["atempo=0.5"])
+
+    def test_silence_trim_keeps_a_short_pause(self):
+        (silence_filter,) = build_filters(True, -35, 1.5, 0.4, 1.0)
+
+        self.assertIn("stop_duration=1.5", silence_filter)
+        self.assertIn("stop_threshold=-35dB", silence_filter)
+        self.assertIn("stop_silence=0.4", silence_filter)
+
+
+class PreprocessAudioTest(unittest.TestCase):
+    def test_report_measures_the_savings(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source = Path(directory.name) / "audio.webm"
+        source.write_bytes(b"x" * 1000)
+
+        async def fake_run(*command):
+            # ffmpeg escribe la salida en el último argumento.
+            Path(command[-1]).write_bytes(b"x" * 300)
+            return 0, "", ""
+
+        async def fake_duration(path):
+            return 600.0 if path == str(source) else 480.0
+
+        with mock.patch.object(audio_preprocessor, "run_command", fake_run), \
+                mock.patch.object(audio_preprocessor, "probe_duration", fake_duration):
+            report = asyncio.run(preprocess_audio(str(source), directory.name))
+
+        self.assertTrue(report["path"].endswith("audio_speech.ogg"))
+        self.assertEqual((report["bytes_saved"], report["seconds_saved"]), (700, 120.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import re
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import processing.audio_transcriber as audio_transcriber
+from processing.audio_transcriber import SegmentedTranscriber, plan_segments, stitch_segments
+
+
+class PlanAndStitchTest(unittest.TestCase):
+    def test_plan_segments_cuts_on_nearest_silence(self):
+        plan = plan_segments(1500, [(598, 601), (1195, 1199)], target_seconds=600, overlap_seconds=2, search_seconds=30)
+
+        self.assertEqual([(s["start"], s["end"]) for s in plan], [(0.0, 599.5), (599.5, 1197.0), (1197.0, 1500)])
+        self.assertEqual(plan[0]["clip_start"], 0.0)
+        self.assertEqual(plan[1]["clip_start"], 597.5)
+        self.assertEqual(plan[1]["clip_end"], 1199.0)
+        self.assertEqual(plan[-1]["clip_end"], 1500)
+
+    def test_plan_segments_without_silences_cuts_at_target(self):
+        plan = plan_segments(1500, [], target_seconds=600, overlap_seconds=2, search_seconds=30)
+
+        self.assertEqual([(s["start"], s["end"]) for s in plan], [(0.0, 600), (600, 1200), (1200, 1500)])
+
+    def test_stitch_segments_keeps_overlap_once(self):
+        plan = plan_segments(40, [], target_seconds=20, overlap_seconds=2, search_seconds=0)
+        # El segundo segmento arranca en 18s: su frase "dos" (18-21s) cae en la
+        # zona solapada y su punto medio pertenece al primero.
+        results = [
+            {"text": "", "segments": [{"start": 0, "end": 10, "text": "uno"}, {"start": 18, "end": 21, "text": "dos"}]},
+            {"text": "", "segments": [{"start": 0, "end": 3, "text": "dos"}, {"start": 5, "end": 15, "text": "tres"}]},
+        ]
+
+        self.assertEqual(stitch_segments(plan, results), "uno dos tres")
+
+    def test_stitch_segments_falls_back_to_plain_text(self):
+        plan = plan_segments(40, [], target_seconds=20, overlap_seconds=2, search_seconds=0)
+        results = [{"text": " hola "}, {"text": "mundo"}]
+
+        self.assertEqual(stitch_segments(plan, results), "hola mundo")
+
+
+class _StubWhisperHandler(BaseHTTPRequestHandler):
+    # Cada "segmento" es un archivo con "clip_start,clip_end"; el stub responde
+    # una frase por bloque de 10s en tiempos relativos al recorte, como Whisper.
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode(errors="replace")
+        clip_start, clip_end = map(float, re.search(r"\r\n\r\n([\d.]+),([\d.]+)\r\n", body).groups())
+
+        segments = []
+        block = int(clip_start // 10) * 10
+        while block < clip_end:
+            if block >= clip_start:
+                segments.append({
+                    "start": block - clip_start,
+                    "end": min(block + 10, clip_end) - clip_start,
+                    "text": f"b{block}."
+                })
+            block += 10
+
+        payload = json.dumps({"text": " ".join(s["text"] for s in segments), "segments": segments}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+async def _fake_duration(audio_path):
+    return 1500.0
+
+
+async def _fake_silences(audio_path, noise_db, min_seconds):
+    return [(598, 601), (1195, 1199)]
+
+
+async def _fake_cut(self, audio_path, segment, work_dir):
+    # Sin ffmpeg: el "recorte" solo lleva sus límites para el stub.
+    segment_path = Path(work_dir) / f"segment_{segment['index']:04d}.txt"
+    segment_path.write_text(f"{segment['clip_start']},{segment['clip_end']}")
+    return segment_path
+
+
+class StubServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubWhisperHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @mock.patch.object(SegmentedTranscriber, "_cut_segment", _fake_cut)
+    @mock.patch.object(audio_transcriber, "detect_silences", _fake_silences)
+    @mock.patch.object(audio_transcriber, "probe_duration", _fake_duration)
+    def test_transcribe_stitches_parallel_segments(self):
+        transcriber = SegmentedTranscriber(
+            api_key="stub",
+            base_url=f"http://127.0.0.1:{self.server.server_address[1]}/v1",
+            concurrency=2,
+            segment_seconds=600,
+            overlap_seconds=2,
+            search_seconds=30
+        )
+
+        async def run(audio_path):
+            try:
+                return await transcriber.transcribe(audio_path)
+            finally:
+                await transcriber.close()
+
+        with tempfile.NamedTemporaryFile(suffix=".ogg") as audio_file:
+            text = asyncio.run(run(audio_file.name))
+
+        self.assertEqual(text, " ".join(f"b{block}." for block in range(0, 1500, 10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from processing.extraction_cache import ExtractionCache
+
+
+PAGES = [("Primera página.", "pdfplumber"), ("", "pypdf2"), ("Tercera página.", "pdfplumber")]
+
+
+class ExtractionCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = Path(directory.name)
+
+    def test_stored_pages_are_read_back_in_order(self):
+        cache = ExtractionCache(self.cache_dir, max_bytes=1024 * 1024)
+
+        self.assertIsNone(cache.lookup("abc"))
+        self.assertTrue(cache.store("abc", PAGES))
+        self.assertEqual(list(cache.lookup("abc")), PAGES)
+        self.assertEqual((cache.hits, cache.misses, cache.stores), (1, 1, 1))
+
+    def test_aborted_writer_publishes_nothing(self):
+        cache = ExtractionCache(self.cache_dir, max_bytes=1024 * 1024)
+
+        writer = cache.writer("abc")
+        writer.write("Página a medias.", "pdfplumber")
+        writer.abort()
+
+        self.assertIsNone(cache.lookup("abc"))
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ExtractionCache(self.cache_dir, max_bytes=1024 * 1024)
+        for file_hash in ("a", "b"):
+            cache.store(file_hash, [(os.urandom(2000).hex(), "pdfplumber")])
+        # "a" se usó hace más tiempo que "b".
+        os.utime(cache._path("a"), (1, 1))
+
+        cache.max_bytes = cache._path("b").stat().st_size + 100
+        cache.store("c", [("Texto corto.", "pdfplumber")])
+
+        self.assertIsNone(cache.lookup("a"))
+        self.assertIsNotNone(cache.lookup("b"))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_hash_file_is_the_sha256_of_the_bytes(self):
+        path = self.cache_dir / "doc.pdf"
+        content = b"%PDF-1.4 contenido" * 100000
+        path.write_bytes(content)
+
+        self.assertEqual(ExtractionCache.hash_file(path), hashlib.sha256(content).hexdigest())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,330 @@
+import sys
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# El paquete database vive en el backend y no es importable desde ml-core en
+# los tests: se sustituye por módulos simulados antes de importar el servicio.
+for _module in (
+    "database",
+    "database.db_manager",
+    "database.cache_manager",
+    "database.session_handler",
+    "database.transcript_store",
+    "database.models",
+):
+    sys.modules.setdefault(_module, mock.MagicMock())
+
+import llm_service
+from llm_service import AIService
+
+
+def _word_count(text, model_name="gpt-4"):
+    return len(text.split())
+
+
+def make_service(**attributes) -> AIService:
+    # Solo el estado que usan los métodos bajo prueba, sin clientes ni conexiones.
+    service = object.__new__(AIService)
+    service.default_model = "gpt-4"
+    service.reduce_strategy = "tree"
+    service.reduce_token_budget = 10
+    service.__dict__.update(attributes)
+    return service
+
+
+@mock.patch.object(llm_service, "count_tokens", _word_count)
+class TreeReduceTest(unittest.TestCase):
+    def test_groups_fill_the_token_budget(self):
+        service = make_service()
+        summaries = ["uno dos tres cuatro"] * 4
+
+        self.assertEqual(service._group_by_token_budget(summaries), [summaries[:2], summaries[2:]])
+
+    def test_groups_keep_two_summaries_even_over_budget(self):
+        service = make_service()
+        summaries = [" ".join(["palabra"] * 20)] * 4
+
+        self.assertEqual([len(group) for group in service._group_by_token_budget(summaries)], [2, 2])
+
+    def test_trailing_single_summary_joins_previous_group(self):
+        service = make_service()
+        summaries = ["uno dos tres cuatro"] * 5
+
+        self.assertEqual([len(group) for group in service._group_by_token_budget(summaries)], [2, 3])
+
+    def test_reduce_stops_when_summaries_fit_one_prompt(self):
+        service = make_service()
+        calls = []
+
+        async def fake_map(prompts, model=None):
+            calls.append((prompts, model))
+            return ["parcial combinado"] * len(prompts)
+
+        service._map_chunks = fake_map
+        summaries = ["uno dos tres cuatro"] * 8
+
+        reduced = asyncio.run(service._reduce_summaries(
+            summaries, "Título", lambda group, title, i, total: {"group": group}, model="claude-3-5-sonnet"
+        ))
+
+        # 8 resúmenes de 4 tokens: un nivel de 4 grupos y los 4 parciales ya caben juntos.
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0][1], "claude-3-5-sonnet")
+        self.assertEqual(reduced, ["parcial combinado"] * 4)
+
+    def test_flat_strategy_returns_summaries_unchanged(self):
+        service = make_service(reduce_strategy="flat")
+        summaries = ["uno dos tres cuatro"] * 8
+
+        self.assertEqual(asyncio.run(service._reduce_summaries(summaries, "Título", None)), summaries)
+
+
+class _DictResponseCache:
+    def __init__(self):
+        self.entries = {}
+
+    def build_key(self, model, prompt, params):
+        return repr((model, prompt, sorted(params.items())))
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, response):
+        self.entries[key] = response
+
+
+class RunModelCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.service = make_service(response_cache=_DictResponseCache())
+        self.calls = 0
+
+        async def fake_provider(prompt, response_format, model):
+            self.calls += 1
+            return {"quiz": self.calls}
+
+        self.service._call_provider = fake_provider
+
+    def test_repeated_prompt_is_served_from_cache(self):
+        async def run():
+            first = await self.service._run_model({"system": "s", "user": "u"}, response_format="json")
+            second = await self.service._run_model({"system": "s", "user": "u"}, response_format="json")
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), ({"quiz": 1}, {"quiz": 1}))
+        self.assertEqual(self.calls, 1)
+
+    def test_non_cacheable_calls_always_reach_the_provider(self):
+        async def run():
+            first = await self.service._run_model({"system": "s", "user": "u"}, response_format="json", cacheable=False)
+            second = await self.service._run_model({"system": "s", "user": "u"}, response_format="json", cacheable=False)
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), ({"quiz": 1}, {"quiz": 2}))
+        self.assertEqual(self.service.response_cache.entries, {})
+
+
+class _FakeLockCache:
+    def __init__(self, free_after: int = 0):
+        # El lock está tomado por "otra réplica" durante los primeros intentos.
+        self.free_after = free_after
+        self.attempts = 0
+        self.extended = 0
+        self.released = []
+
+    def acquire_lock(self, name, ttl=900):
+        self.attempts += 1
+        return "token" if self.attempts > self.free_after else None
+
+    def extend_lock(self, name, token, ttl=900):
+        self.extended += 1
+        return True
+
+    def release_lock(self, name, token):
+        self.released.append((name, token))
+        return True
+
+
+class SingleFlightTest(unittest.TestCase):
+    def make(self, cache):
+        return make_service(cache=cache, analysis_lock_ttl=900, analysis_lock_poll=0.001, _inflight={})
+
+    def test_concurrent_identical_analyses_run_once(self):
+        service = self.make(_FakeLockCache())
+        runs = []
+
+        async def compute():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return {"title": "T"}
+
+        async def run():
+            return await asyncio.gather(*[
+                service._single_flight("hash", compute=compute, lookup=lambda: None)
+                for _ in range(3)
+            ])
+
+        self.assertEqual(asyncio.run(run()), [{"title": "T"}] * 3)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(service.cache.released, [("analysis:hash", "token")])
+        self.assertEqual(service._inflight, {})
+
+    def test_waiter_reads_result_published_by_lock_owner(self):
+        service = self.make(_FakeLockCache(free_after=10))
+        published = iter([None, None, {"title": "otra réplica"}])
+
+        async def compute():
+            raise AssertionError("no debe ejecutarse sin el lock")
+
+        result = asyncio.run(service._single_flight("hash", compute=compute, lookup=lambda: next(published)))
+
+        self.assertEqual(result, {"title": "otra réplica"})
+        self.assertEqual(service.cache.released, [])
+
+    def test_owner_extends_the_lock_while_computing(self):
+        service = self.make(_FakeLockCache())
+        service.analysis_lock_ttl = 0.03
+
+        async def compute():
+            await asyncio.sleep(0.1)
+            return "ok"
+
+        self.assertEqual(asyncio.run(service._single_flight("hash", compute=compute, lookup=lambda: None)), "ok")
+        self.assertGreaterEqual(service.cache.extended, 2)
+
+
+class _InlineExecutor:
+    async def run(self, fn, *args):
+        return fn(*args)
+
+
+class _DictChunkCache:
+    def __init__(self):
+        self.chunk_summaries = {}
+
+    def get_cached_chunk_summary(self, key):
+        return self.chunk_summaries.get(key)
+
+    def cache_chunk_summary(self, key, summary, ttl=None):
+        self.chunk_summaries[key] = summary
+
+
+class RoutedModelTest(unittest.TestCase):
+    def test_map_reduce_uses_the_routed_model_for_every_call(self):
+        service = make_service(
+            cpu_executor=_InlineExecutor(),
+            cache=_DictChunkCache(),
+            chunk_summary_ttl=60,
+            map_concurrency=2,
+            chunk_max_retries=0,
+            reduce_strategy="flat",
+            chunking_mode="words",
+            max_chunk_size=3000,
+            text_chunker=SimpleNamespace(chunk_text=lambda content, max_size: content.split("|"))
+        )
+        models = []
+
+        async def fake_run_model(prompt, response_format="text", model=None, cacheable=True):
+            models.append(model)
+            return {"title": "T"} if response_format == "json" else "resumen"
+
+        service._run_model = fake_run_model
+        asyncio.run(service._long_doc_summary("uno|dos|tres", "Título", 9000, model="claude-3-5-sonnet"))
+
+        # 3 fragmentos + metadatos + combinación final.
+        self.assertEqual(models, ["claude-3-5-sonnet"] * 5)
+
+
+class _RejectingExecutor:
+    async def run(self, fn, *args):
+        raise AssertionError("el generador no debe avanzar en el pool CPU")
+
+
+class ChunkStreamTest(unittest.TestCase):
+    def make(self):
+        return make_service(
+            cpu_executor=_RejectingExecutor(),
+            cache=_DictChunkCache(),
+            chunk_summary_ttl=60,
+            map_concurrency=2,
+            chunk_max_retries=0
+        )
+
+    def test_stream_summaries_keep_chunk_order_and_model(self):
+        service = self.make()
+        calls = []
+
+        async def fake_run_model(prompt, response_format="text", model=None, cacheable=True):
+            calls.append(model)
+            await asyncio.sleep(0.001)
+            return f"resumen de {prompt}"
+
+        service._run_model = fake_run_model
+        chunks = ({"text": f"parte {i}", "hash": str(i)} for i in range(7))
+
+        summaries = asyncio.run(service._summarize_chunk_stream(
+            chunks, lambda text: text, "pdf", model="claude-3-5-sonnet"
+        ))
+
+        self.assertEqual(summaries, [f"resumen de parte {i}" for i in range(7)])
+        self.assertEqual(calls, ["claude-3-5-sonnet"] * 7)
+
+    def test_generator_errors_reach_the_caller(self):
+        service = self.make()
+
+        async def fake_run_model(prompt, response_format="text", model=None, cacheable=True):
+            return "resumen"
+
+        def chunks():
+            yield {"text": "parte 0", "hash": "0"}
+            raise ValueError("PDF corrupto")
+
+        service._run_model = fake_run_model
+
+        with self.assertRaises(ValueError):
+            asyncio.run(service._summarize_chunk_stream(chunks(), lambda text: text, "pdf"))
+
+
+    def test_failed_summary_stops_the_producer(self):
+        service = self.make()
+        produced = []
+
+        async def failing_run_model(prompt, response_format="text", model=None, cacheable=True):
+            raise ValueError("proveedor caído")
+
+        def chunks():
+            for i in range(100):
+                produced.append(i)
+                yield {"text": f"parte {i}", "hash": str(i)}
+
+        service._run_model = failing_run_model
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(service._summarize_chunk_stream(chunks(), lambda text: text, "pdf"))
+        # La cola acotada impide que el productor recorra todo el documento.
+        self.assertLess(len(produced), 100)
+
+
+class ChunkSummaryKeyTest(unittest.TestCase):
+    def test_key_includes_model_and_prompt_version(self):
+        service = make_service()
+        chunk = {"text": "texto", "hash": "abc"}
+
+        key = service._chunk_summary_key("pdf", chunk)
+
+        self.assertEqual(key, f"pdf:v{llm_service.CHUNK_PROMPT_VERSION}:gpt-4:abc")
+        self.assertNotEqual(key, service._chunk_summary_key("pdf", chunk, "claude-3-5-sonnet"))
+
+    def test_word_budget_follows_the_document_token_ratio(self):
+        service = make_service(max_chunk_size=3000)
+
+        # 2 tokens por palabra: 3000 tokens son 1500 palabras.
+        self.assertEqual(service._word_budget(20000, 10000), 1500)
+        # Nunca más palabras que tokens, aunque el texto sea muy "barato".
+        self.assertEqual(service._word_budget(5000, 10000), 3000)
+        self.assertEqual(service._word_budget(0, 0), 3000)
+
+
+if __name__ == "__main__":
+    unittest.main()
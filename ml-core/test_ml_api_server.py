@@ -0,0 +1,85 @@
+import sys
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+# ml_api_server crea AIService al importarse (base de datos, Redis, clientes
+# LLM): se importa con un servicio simulado.
+with mock.patch.dict(sys.modules, {"llm_service": mock.MagicMock()}):
+    import ml_api_server
+
+
+class _FakeUpload:
+    # Entrega el contenido en bloques, como una subida sin Content-Length.
+    def __init__(self, blocks, fail_after=None):
+        self.blocks = list(blocks)
+        self.fail_after = fail_after
+        self.reads = 0
+
+    async def read(self, size):
+        self.reads += 1
+        if self.fail_after is not None and self.reads > self.fail_after:
+            raise asyncio.CancelledError()
+        return self.blocks.pop(0) if self.blocks else b""
+
+
+class SaveUploadTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.uploads_dir = Path(directory.name)
+
+        for patcher in (
+            mock.patch.object(ml_api_server.settings, "UPLOADS_DIR", self.uploads_dir),
+            mock.patch.object(ml_api_server, "MAX_UPLOAD_BYTES", 10),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def save(self, upload):
+        return asyncio.run(ml_api_server._save_upload_file(upload))
+
+    def test_upload_is_stored_under_its_hash(self):
+        file_path, file_hash = self.save(_FakeUpload([b"%PDF", b"-1.4"]))
+
+        self.assertEqual(file_path, self.uploads_dir / f"{file_hash}.pdf")
+        self.assertEqual(file_path.read_bytes(), b"%PDF-1.4")
+        self.assertEqual(list(self.uploads_dir.iterdir()), [file_path])
+
+    def test_oversized_chunked_upload_is_rejected_and_removed(self):
+        with self.assertRaises(HTTPException) as raised:
+            self.save(_FakeUpload([b"%PDF-1.4", b"contenido de sobra"]))
+
+        self.assertEqual(raised.exception.status_code, 413)
+        self.assertEqual(list(self.uploads_dir.iterdir()), [])
+
+    def test_cancelled_upload_leaves_no_partial_file(self):
+        with self.assertRaises(asyncio.CancelledError):
+            self.save(_FakeUpload([b"%PDF", b"-1.4"], fail_after=1))
+
+        self.assertEqual(list(self.uploads_dir.iterdir()), [])
+
+
+class ContentLengthLimitTest(unittest.TestCase):
+    def test_declared_oversized_body_is_rejected_before_reading(self):
+        client = TestClient(ml_api_server.app)
+        body = b"x" * (ml_api_server.MULTIPART_OVERHEAD_BYTES + 100)
+
+        with mock.patch.object(ml_api_server, "MAX_UPLOAD_BYTES", 10):
+            response = client.post(
+                "/analyze/pdf",
+                files={"file": ("doc.pdf", body, "application/pdf")},
+                data={"session_id": "s1"}
+            )
+
+        self.assertEqual(response.status_code, 413)
+        ml_api_server.ai_service.analyze_pdf.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
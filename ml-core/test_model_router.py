@@ -0,0 +1,84 @@
+import unittest
+from types import SimpleNamespace
+
+from models.model_router import ModelRouter
+
+
+def make_settings(**overrides) -> SimpleNamespace:
+    settings = {
+        "DEFAULT_LLM_MODEL": "gpt-4o",
+        "ROUTING_MODELS": ["gpt-4o", "claude-3-5-sonnet"],
+        "ROUTING_POLICY": "balanced",
+        "MAX_CHUNK_SIZE": 3000,
+        "MAP_CONCURRENCY": 5,
+        "REDUCE_STRATEGY": "tree",
+        "REDUCE_TOKEN_BUDGET": 6000,
+        "OPENAI_API_KEY": "sk-test",
+        "ANTHROPIC_API_KEY": "sk-ant-test",
+    }
+    settings.update(overrides)
+    return SimpleNamespace(**settings)
+
+
+class RouteTest(unittest.TestCase):
+    def test_short_document_uses_a_single_call(self):
+        route = ModelRouter(make_settings()).route(5000)
+
+        self.assertEqual(route["strategy"], "single")
+        self.assertIn(route["model"], ["gpt-4o", "claude-3-5-sonnet"])
+
+    def test_document_larger_than_every_window_uses_map_reduce(self):
+        route = ModelRouter(make_settings()).route(250000)
+
+        self.assertEqual(route, {**route, "strategy": "map_reduce", "model": "gpt-4o"})
+
+    def test_models_without_api_key_are_not_candidates(self):
+        router = ModelRouter(make_settings(ANTHROPIC_API_KEY=""))
+
+        # 150k tokens solo caben en la ventana de Claude (200k).
+        self.assertEqual(router.route(150000)["strategy"], "map_reduce")
+
+    def test_cost_policy_picks_the_cheapest_candidate(self):
+        router = ModelRouter(make_settings(ROUTING_POLICY="cost", ROUTING_MODELS=["gpt-4o", "gpt-4o-mini"]))
+
+        self.assertEqual(router.route(20000)["model"], "gpt-4o-mini")
+
+
+class EstimateTest(unittest.TestCase):
+    def test_metadata_call_adds_cost(self):
+        router = ModelRouter(make_settings())
+
+        with_metadata = router._estimate_single("gpt-4o", 20000)
+        without_metadata = router._estimate_single("gpt-4o", 20000, with_metadata=False)
+
+        self.assertGreater(with_metadata["estimated_cost"], without_metadata["estimated_cost"])
+        # En paralelo al resumen: no alarga la llamada más lenta.
+        self.assertEqual(with_metadata["estimated_latency"], without_metadata["estimated_latency"])
+
+    def test_tree_reduce_levels_follow_the_token_budget(self):
+        router = ModelRouter(make_settings())
+
+        # 100 resúmenes de 250 tokens (25k) con presupuesto de 6k: un nivel
+        # de 5 grupos, y los 5 parciales ya caben en el prompt final.
+        cost, latency, remaining = router._estimate_reduce_levels("gpt-4o", 100)
+
+        self.assertEqual(remaining, 5)
+        self.assertGreater(cost, 0)
+        self.assertGreater(latency, 0)
+
+    def test_flat_reduce_has_no_intermediate_levels(self):
+        router = ModelRouter(make_settings(REDUCE_STRATEGY="flat"))
+
+        self.assertEqual(router._estimate_reduce_levels("gpt-4o", 100), (0.0, 0.0, 100))
+
+    def test_map_reduce_estimate_includes_reduce_levels(self):
+        tree = ModelRouter(make_settings())._estimate_map_reduce("gpt-4o", 300000, with_metadata=False)
+        flat = ModelRouter(make_settings(REDUCE_STRATEGY="flat"))._estimate_map_reduce("gpt-4o", 300000, with_metadata=False)
+
+        # Los niveles intermedios agregan una ronda de llamadas antes del final.
+        self.assertGreater(tree["estimated_cost"], flat["estimated_cost"])
+        self.assertGreater(tree["estimated_latency"], flat["estimated_latency"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+from unittest import mock
+
+import processing.pdf_processor as pdf_processor
+
+
+GARBLED = "(cid:12)(cid:7)(cid:9) (cid:4)(cid:15)"
+
+
+class _FakePage:
+    def __init__(self, page_number, text):
+        self.page_number = page_number
+        self.text = text
+        self.flushed = False
+
+    def extract_text(self):
+        return self.text
+
+    def flush_cache(self):
+        self.flushed = True
+
+
+class _FakePDF:
+    def __init__(self, texts):
+        self.pages = [_FakePage(i + 1, text) for i, text in enumerate(texts)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _FakeFallback:
+    # Sustituye a _LazyPyPDF2Reader y registra qué páginas se le piden.
+    instances = []
+
+    def __init__(self, file_path):
+        self.requested = []
+        _FakeFallback.instances.append(self)
+
+    def page_count(self):
+        return 3
+
+    def extract(self, page_index):
+        self.requested.append(page_index)
+        return f"texto pypdf2 {page_index + 1}"
+
+    def close(self):
+        pass
+
+
+class PerPageFallbackTest(unittest.TestCase):
+    def setUp(self):
+        _FakeFallback.instances = []
+        patcher = mock.patch.object(pdf_processor, "_LazyPyPDF2Reader", _FakeFallback)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def extract(self, pdf):
+        with mock.patch.object(pdf_processor.pdfplumber, "open", return_value=pdf):
+            return pdf_processor._extract_page_range("doc.pdf")
+
+    def test_only_unusable_pages_use_pypdf2(self):
+        pdf = _FakePDF(["página uno legible", GARBLED, "", "página cuatro legible"])
+
+        pages = self.extract(pdf)
+
+        self.assertEqual(pages, [
+            ("página uno legible", "pdfplumber"),
+            ("texto pypdf2 2", "pypdf2"),
+            ("texto pypdf2 3", "pypdf2"),
+            ("página cuatro legible", "pdfplumber"),
+        ])
+        self.assertEqual(_FakeFallback.instances[0].requested, [1, 2])
+        self.assertTrue(all(page.flushed for page in pdf.pages))
+
+    def test_readable_document_never_asks_pypdf2(self):
+        self.extract(_FakePDF(["uno", "dos", "tres"]))
+
+        self.assertEqual(_FakeFallback.instances[0].requested, [])
+
+    def test_pdfplumber_failure_falls_back_for_the_whole_range(self):
+        with mock.patch.object(pdf_processor.pdfplumber, "open", side_effect=ValueError("PDF dañado")):
+            pages = pdf_processor._extract_page_range("doc.pdf")
+
+        self.assertEqual([backend for _, backend in pages], ["pypdf2"] * 3)
+
+    def test_garbled_detection(self):
+        self.assertTrue(pdf_processor._is_unusable("   "))
+        self.assertTrue(pdf_processor._is_unusable(GARBLED))
+        self.assertFalse(pdf_processor._is_unusable("Texto normal con un (cid:3) suelto en medio de la frase."))
+
+
+SUBJECTS = ["reales", "racionales", "enteros", "naturales", "complejos", "irracionales"]
+
+
+def body(page):
+    # Cuerpo distinto en cada página, como en un documento real.
+    subject = SUBJECTS[page % len(SUBJECTS)]
+    return (
+        f"Los números {subject} forman un conjunto con propiedades que se\n"
+        f"estudian en detalle a lo largo de este capítulo, empezando por la\n"
+        f"relación de orden y las operaciones definidas sobre los {subject}."
+    )
+
+
+def clean(pages):
+    # _clean_pages no usa el estado del procesador (pools ni caché).
+    return object.__new__(pdf_processor.PDFProcessor)._clean_pages(pages)
+
+
+class BoilerplateTest(unittest.TestCase):
+    def test_page_number_footer_is_removed(self):
+        pages = [f"{body(i)}\nPágina {i} de 6" for i in range(1, 7)]
+
+        self.assertTrue(all("Página" not in page for page in clean(pages)))
+
+    def test_repeated_running_header_is_removed(self):
+        pages = [f"Manual de Álgebra - Edición 2024\n{body(i)}\n{i}" for i in range(1, 7)]
+
+        for page in clean(pages):
+            self.assertTrue(page.startswith("Los números"))
+            self.assertTrue(page.endswith("."))
+
+    def test_header_must_match_apart_from_digits(self):
+        # Misma forma pero distinto texto: no es una cabecera repetida.
+        pages = [f"Nota del capítulo {name}\n{body(i)}" for i, name in enumerate(["uno", "dos", "tres", "cuatro"])]
+
+        self.assertTrue(all(page.startswith("Nota del capítulo") for page in clean(pages)))
+
+    def test_numbered_headings_survive(self):
+        pages = [f"Tema {i}\n{body(i)}\nPropiedad {i}." for i in range(1, 7)]
+
+        for i, page in enumerate(clean(pages), start=1):
+            self.assertTrue(page.startswith(f"Tema {i}\n\nLos números"))
+            self.assertTrue(page.endswith(f"Propiedad {i}."))
+
+    def test_numbered_item_does_not_absorb_the_next_sentence(self):
+        lines = [
+            "Ejemplo 2. Calcule el límite de la sucesión cuando n tiende a infinito.",
+            "La sucesión converge porque está acotada y es monótona creciente, como se",
+            "demostró en la sección anterior del capítulo.",
+        ]
+
+        cleaned = object.__new__(pdf_processor.PDFProcessor)._clean_lines(lines)
+
+        self.assertEqual(cleaned.split("\n\n"), [lines[0], " ".join(lines[1:])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+
+from models.response_cache import ResponseCache
+
+
+class _FakeCacheManager:
+    # Sustituye a CacheManager: un dict en lugar de Redis.
+    def __init__(self):
+        self.entries = {}
+
+    def get_cached_llm_response(self, prompt_hash):
+        return self.entries.get(prompt_hash)
+
+    def cache_llm_response(self, prompt_hash, response, ttl=86400):
+        self.entries[prompt_hash] = response
+        return True
+
+
+PROMPT = {"system": "Eres un asistente.", "user": "Resume   el\ntexto."}
+PARAMS = {"response_format": "json", "temperature": 0.3, "max_tokens": 4096}
+
+
+class BuildKeyTest(unittest.TestCase):
+    def test_whitespace_does_not_change_the_key(self):
+        cache = ResponseCache(_FakeCacheManager())
+        reformatted = {"system": " Eres un asistente. ", "user": "Resume el texto."}
+
+        self.assertEqual(cache.build_key("gpt-4", PROMPT, PARAMS), cache.build_key("gpt-4", reformatted, PARAMS))
+
+    def test_model_and_params_are_part_of_the_key(self):
+        cache = ResponseCache(_FakeCacheManager())
+        key = cache.build_key("gpt-4", PROMPT, PARAMS)
+
+        self.assertNotEqual(key, cache.build_key("gpt-4o", PROMPT, PARAMS))
+        self.assertNotEqual(key, cache.build_key("gpt-4", PROMPT, {**PARAMS, "response_format": "text"}))
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_miss_then_memory_hit(self):
+        cache = ResponseCache(_FakeCacheManager())
+
+        async def run():
+            missing = await cache.get("k")
+            await cache.set("k", {"title": "T"})
+            return missing, await cache.get("k")
+
+        missing, cached = asyncio.run(run())
+
+        self.assertIsNone(missing)
+        self.assertEqual(cached, {"title": "T"})
+        self.assertEqual((cache.misses, cache.memory_hits, cache.redis_hits), (1, 1, 0))
+
+    def test_returned_responses_are_copies(self):
+        cache = ResponseCache(_FakeCacheManager())
+
+        async def run():
+            await cache.set("k", {"questions": [1, 2]})
+            first = await cache.get("k")
+            first["questions"].append(3)
+            return await cache.get("k")
+
+        self.assertEqual(asyncio.run(run()), {"questions": [1, 2]})
+
+    def test_evicted_entries_are_read_back_from_redis(self):
+        manager = _FakeCacheManager()
+        cache = ResponseCache(manager, max_entries=1)
+
+        async def run():
+            await cache.set("a", "respuesta a")
+            await cache.set("b", "respuesta b")
+            return await cache.get("a")
+
+        self.assertEqual(asyncio.run(run()), "respuesta a")
+        self.assertEqual(cache.redis_hits, 1)
+        # La lectura desde Redis vuelve a dejar la entrada en memoria.
+        self.assertEqual(list(cache._entries), ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import re
+import unittest
+from unittest import mock
+
+import processing.text_chunker as text_chunker
+from processing.text_chunker import TextChunker
+
+
+class _FakeEncoding:
+    # Un token por palabra con su espacio previo y otro por cada salto de
+    # línea, como cl100k con texto común. tiktoken descarga sus tablas de BPE,
+    # así que los tests usan esta codificación determinista.
+    def __init__(self):
+        self.pieces = []
+        self.ids = {}
+
+    def encode(self, text, disallowed_special=()):
+        tokens = []
+        for match in re.finditer(r"\n+|[ \t]*\S+|\s+", text):
+            piece = match.group()
+            if piece not in self.ids:
+                self.ids[piece] = len(self.pieces)
+                self.pieces.append(piece)
+            tokens.append(self.ids[piece])
+        return tokens
+
+    def decode_with_offsets(self, tokens):
+        text = ""
+        offsets = []
+        for token in tokens:
+            offsets.append(len(text))
+            text += self.pieces[token]
+        return text, offsets
+
+
+ENCODING = _FakeEncoding()
+
+
+def _paragraphs(count, words_per_sentence=8, sentences=3):
+    return "\n\n".join(
+        " ".join(
+            " ".join(f"p{p}s{s}w{w}" for w in range(words_per_sentence)) + "."
+            for s in range(sentences)
+        )
+        for p in range(count)
+    )
+
+
+def make_chunker(overlap_words=0, overlap_tokens=0) -> TextChunker:
+    chunker = TextChunker()
+    chunker.chunk_overlap = overlap_words
+    chunker.chunk_overlap_tokens = overlap_tokens
+    return chunker
+
+
+@mock.patch.object(text_chunker, "get_encoding", lambda model_name="gpt-4": ENCODING)
+class TokenChunkTest(unittest.TestCase):
+    def test_chunks_stay_within_the_token_budget(self):
+        text = _paragraphs(10)
+        chunks = make_chunker(overlap_tokens=5).chunk_by_tokens(text, 40)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(chunk["token_count"], 40)
+            self.assertLessEqual(len(ENCODING.encode(chunk["text"])), 40)
+
+    def test_chunks_prefer_paragraph_boundaries(self):
+        # Párrafos de 24 tokens con presupuesto de 30: cada fragmento es un párrafo.
+        text = _paragraphs(4)
+        chunks = make_chunker().chunk_by_tokens(text, 30)
+
+        self.assertEqual([chunk["text"].strip() for chunk in chunks], text.split("\n\n"))
+
+    def test_overlap_repeats_the_tail_of_the_previous_chunk(self):
+        text = _paragraphs(6)
+        chunks = make_chunker(overlap_tokens=4).chunk_by_tokens(text, 30)
+
+        # Los fragmentos son cortes del texto original: cada uno arranca antes
+        # del final del anterior, y lo repetido son a lo sumo 4 tokens.
+        position = 0
+        previous_end = None
+        for chunk in chunks:
+            start = text.index(chunk["text"], position)
+            if previous_end is not None:
+                self.assertLess(start, previous_end)
+                self.assertLessEqual(len(ENCODING.encode(text[start:previous_end])), 4)
+            position = start + 1
+            previous_end = start + len(chunk["text"])
+
+    def test_chunks_cover_the_whole_text(self):
+        text = _paragraphs(7)
+        chunks = make_chunker().chunk_by_tokens(text, 35)
+
+        self.assertEqual("".join(chunk["text"] for chunk in chunks), text)
+
+    def test_empty_text_has_no_chunks(self):
+        self.assertEqual(make_chunker().chunk_by_tokens("", 30), [])
+
+    def test_pages_are_chunked_within_the_token_budget(self):
+        pages = _paragraphs(12).split("\n\n")
+        chunks = list(make_chunker().iter_token_chunks_from_pages(pages, 40))
+
+        self.assertTrue(all(len(ENCODING.encode(chunk)) <= 40 for chunk in chunks))
+        self.assertEqual([word for chunk in chunks for word in chunk.split()], "\n\n".join(pages).split())
+
+
+class WordChunkTest(unittest.TestCase):
+    def test_spans_are_slices_of_the_original_text(self):
+        text = _paragraphs(8)
+        chunker = make_chunker(overlap_words=3)
+
+        for (start, end), chunk in zip(chunker.iter_chunk_spans(text, 30), chunker.chunk_text(text, 30)):
+            self.assertEqual(text[start:end], chunk)
+
+    def test_paragraphs_are_grouped_up_to_the_word_budget(self):
+        # Párrafos de 24 palabras con presupuesto de 50: dos por fragmento.
+        text = _paragraphs(6)
+        chunks = make_chunker().chunk_text(text, 50)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(all(len(chunk.split()) == 48 for chunk in chunks))
+
+    def test_long_paragraph_is_split_on_sentences(self):
+        text = _paragraphs(1, words_per_sentence=10, sentences=6)
+        chunks = make_chunker().chunk_text(text, 25)
+
+        self.assertTrue(all(chunk.endswith(".") for chunk in chunks))
+        self.assertTrue(all(len(chunk.split()) <= 25 for chunk in chunks))
+
+    def test_pages_are_chunked_within_the_word_budget(self):
+        pages = _paragraphs(12).split("\n\n")
+        chunks = list(make_chunker().iter_chunks_from_pages(pages, 50))
+
+        self.assertTrue(all(len(chunk.split()) <= 50 for chunk in chunks))
+        self.assertEqual([word for chunk in chunks for word in chunk.split()], "\n\n".join(pages).split())
+
+    def test_unpunctuated_span_is_split_by_word_count(self):
+        text = " ".join(f"w{i}" for i in range(250))
+        chunks = make_chunker().chunk_text(text, 40)
+
+        self.assertEqual([len(chunk.split()) for chunk in chunks], [40] * 6 + [10])
+        self.assertEqual([word for chunk in chunks for word in chunk.split()], text.split())
+
+
+class ContentDefinedChunkTest(unittest.TestCase):
+    def test_chunks_stay_within_the_word_budget(self):
+        chunks = make_chunker().chunk_content_defined(_paragraphs(20), 40)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk["text"].split()) <= 40 for chunk in chunks))
+
+    def test_local_edit_keeps_distant_chunk_hashes(self):
+        text = _paragraphs(30)
+        edited = text.replace("p15s1w3", "palabra editada")
+
+        original = {chunk["hash"] for chunk in make_chunker().chunk_content_defined(text, 40)}
+        changed = {chunk["hash"] for chunk in make_chunker().chunk_content_defined(edited, 40)}
+
+        # Solo los fragmentos alrededor de la edición cambian de hash.
+        self.assertGreater(len(original & changed), len(original) // 2)
+        self.assertNotEqual(original, changed)
+
+    def test_pages_produce_the_same_chunks_as_joined_text(self):
+        pages = _paragraphs(12).split("\n\n")
+        chunker = make_chunker()
+
+        self.assertEqual(
+            list(chunker.iter_content_defined(pages, 40)),
+            chunker.chunk_content_defined("\n\n".join(pages), 40)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import processing.video_info_cache as video_info_cache
+from processing.video_info_cache import VideoInfoCache
+
+
+class _FakeCacheManager:
+    # Sustituye a CacheManager: un dict de (metadatos, TTL restante) en lugar de Redis.
+    def __init__(self):
+        self.entries = {}
+
+    def get_cached_video_info_with_ttl(self, video_id):
+        return self.entries.get(video_id)
+
+    def cache_video_info(self, video_id, info, ttl=86400):
+        self.entries[video_id] = (dict(info), ttl)
+        return True
+
+
+INFO = {"video_id": "abc", "title": "Clase 1", "duration": 600}
+
+
+class VideoInfoCacheTest(unittest.TestCase):
+    def test_miss_then_memory_hit(self):
+        manager = _FakeCacheManager()
+        cache = VideoInfoCache(manager, ttl=3600)
+
+        async def run():
+            missing = await cache.get("abc")
+            await cache.set("abc", INFO)
+            return missing, await cache.get("abc")
+
+        missing, cached = asyncio.run(run())
+
+        self.assertIsNone(missing)
+        self.assertEqual(cached, INFO)
+        self.assertEqual(manager.entries["abc"], (INFO, 3600))
+        self.assertEqual((cache.misses, cache.memory_hits, cache.redis_hits), (1, 1, 0))
+
+    def test_redis_hit_expires_with_the_redis_entry(self):
+        manager = _FakeCacheManager()
+        manager.entries["abc"] = (INFO, 30)
+        cache = VideoInfoCache(manager, ttl=3600)
+
+        with mock.patch.object(video_info_cache.time, "monotonic", return_value=1000.0):
+            self.assertEqual(asyncio.run(cache.get("abc")), INFO)
+
+        # En memoria vence a los 30 s que le quedaban en Redis, no a la hora.
+        self.assertEqual(cache._entries["abc"][0], 1030.0)
+
+        del manager.entries["abc"]
+        with mock.patch.object(video_info_cache.time, "monotonic", return_value=1031.0):
+            self.assertIsNone(asyncio.run(cache.get("abc")))
+
+    def test_returned_info_is_a_copy(self):
+        cache = VideoInfoCache(_FakeCacheManager())
+
+        async def run():
+            await cache.set("abc", INFO)
+            (await cache.get("abc"))["title"] = "modificado"
+            return await cache.get("abc")
+
+        self.assertEqual(asyncio.run(run()), INFO)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from processing.video_processor import extract_video_id, canonical_video_url
+
+
+class ExtractVideoIdTest(unittest.TestCase):
+    def test_url_forms_share_one_id(self):
+        urls = [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://youtube.com/watch?v=dQw4w9WgXcQ&t=42s&list=PL123",
+            "http://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+            "https://youtu.be/dQw4w9WgXcQ?si=abc",
+            "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+            "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+            "https://www.youtube.com/live/dQw4w9WgXcQ",
+            "www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "  https://youtu.be/dQw4w9WgXcQ  ",
+        ]
+
+        self.assertEqual({extract_video_id(url) for url in urls}, {"dQw4w9WgXcQ"})
+
+    def test_unrecognized_urls_have_no_id(self):
+        for url in [
+            "https://vimeo.com/123456789",
+            "https://www.youtube.com/watch?v=corto",
+            "https://www.youtube.com/channel/UC1234567890",
+            "https://notyoutube.com/watch?v=dQw4w9WgXcQ",
+            "",
+        ]:
+            self.assertIsNone(extract_video_id(url), url)
+
+    def test_canonical_url_round_trips(self):
+        self.assertEqual(extract_video_id(canonical_video_url("dQw4w9WgXcQ")), "dQw4w9WgXcQ")
+
+
+if __name__ == "__main__":
+    unittest.main()